@@ -0,0 +1,34 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL
+from database import async_db, work_day
+
+logger = logging.getLogger(__name__)
+
+# Partiyalar orasidagi tanaffus: handlerlarning yozuvlari navbat kutmasligi uchun
+BATCH_PAUSE = 0.05
+
+async def archive_old_rows(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """`days` kundan eski numbers/pozivnoy qatorlarini oylik arxiv fayllariga ko'chirish"""
+    cutoff_day = work_day(datetime.now(timezone.utc) - timedelta(days=days))
+    moved = {}
+    for table in ("numbers", "pozivnoy"):
+        total = 0
+        while count := await async_db.archive_batch(table, cutoff_day, batch_size):
+            total += count
+            await async_db.reclaim_space()
+            await asyncio.sleep(BATCH_PAUSE)
+        moved[table] = total
+    if any(moved.values()):
+        logger.info(f"Arxivga ko'chirildi ({cutoff_day} gacha): {moved}")
+    return moved
+
+async def archive_periodically():
+    while True:
+        try:
+            await archive_old_rows()
+        except Exception as e:
+            logger.error(f"Arxivlashda xato: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL)
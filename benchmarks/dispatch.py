@@ -0,0 +1,41 @@
+"""Menyu tugmalarini dispatch qilish narxi (update boshiga CPU vaqti).
+
+Ishga tushirish: DB_PATH=/tmp/bench.db python -m benchmarks.dispatch
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("MESSAGE_TRACKER_PERSIST", "0")
+
+import bot as app  # noqa: E402
+from benchmarks.fakes import FakeSession, make_update  # noqa: E402
+
+MENU_TEXTS = [
+    "🔙 Asosiy menyu", "🔢 Raqam + Izoh", "🚖 Pozivnoylar", "👤 XODIM",
+    "🏙️ Viloyatlar", "✏️ Xodim ismi",
+]
+
+async def run(rounds):
+    app.bot.session = FakeSession()
+    users = range(1, 501)
+    updates = [make_update(user_id, text) for _ in range(rounds) for user_id in users for text in MENU_TEXTS]
+    # Isitish: profil keshi va FSM storage yuklanadi
+    for user_id in users:
+        await app.dp.feed_update(app.bot, make_update(user_id, "🔙 Asosiy menyu"))
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    for update in updates:
+        await app.dp.feed_update(app.bot, update)
+    cpu = time.process_time() - started_cpu
+    wall = time.perf_counter() - started
+    print(f"{len(updates)} update: {cpu / len(updates) * 1e6:.1f} µs CPU/update, "
+          f"{len(updates) / wall:.0f} update/s")
+    await app.dp.emit_shutdown(bot=app.bot)
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(run(rounds=3))
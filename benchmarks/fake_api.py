@@ -0,0 +1,139 @@
+"""Lokal soxta Telegram Bot API serveri (aiohttp).
+
+Bot `TELEGRAM_API_URL` orqali shu serverga ulanadi. getUpdates (long
+polling), sendMessage, editMessageText, deleteMessage(s) va
+answerCallbackQuery qo'llab-quvvatlanadi; qolgan metodlar `true` qaytaradi.
+Har bir javobga kechikish va tasodifiy 429 (flood limit) qo'shish mumkin.
+"""
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from aiohttp import web
+
+class FakeBotAPI:
+    def __init__(self, latency=0.0, flood_rate=0.0, retry_after=1, seed=None):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.updates = []
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.new_updates = asyncio.Event()
+        self.polling = asyncio.Event()
+        self.calls = {}
+        self.floods = 0
+        self.reply_waiters = {}
+        self.runner = None
+
+    # Update manbai
+    def push_update(self, kind, payload):
+        """Bot oladigan update qo'shish: ("message", {...}) yoki ("callback_query", {...})"""
+        self.updates.append({"update_id": next(self.update_ids), kind: payload})
+        self.new_updates.set()
+
+    def push_text(self, user_id, text):
+        self.push_update("message", {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Operator"},
+            "text": text,
+        })
+
+    def wait_reply(self, chat_id):
+        """Bot shu chatga navbatdagi xabar yuborganda (yoki tahrirlaganda) bajariladigan future"""
+        future = asyncio.get_running_loop().create_future()
+        self.reply_waiters.setdefault(chat_id, []).append(future)
+        return future
+
+    def _replied(self, chat_id):
+        for future in self.reply_waiters.pop(chat_id, ()):
+            if not future.done():
+                future.set_result(time.perf_counter())
+
+    # Bot API metodlari
+    async def get_updates(self, params):
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        self.polling.set()
+        if offset:
+            self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates and timeout:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        limit = int(params.get("limit") or 100)
+        return self.updates[:limit]
+
+    def send_message(self, params):
+        chat_id = int(params["chat_id"])
+        self._replied(chat_id)
+        return {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Bot"},
+            "text": params.get("text", ""),
+        }
+
+    def edit_message_text(self, params):
+        chat_id = int(params["chat_id"])
+        self._replied(chat_id)
+        return {
+            "message_id": int(params["message_id"]),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Bot"},
+            "text": params.get("text", ""),
+        }
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        params = dict(await request.post()) if request.body_exists else {}
+        if not params and request.content_type == "application/json":
+            params = await request.json()
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "getUpdates":
+            return self._ok(await self.get_updates(params))
+        if method == "getMe":
+            return self._ok({"id": 1, "is_bot": True, "first_name": "Bot", "username": "fake_bot"})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_rate and self.random.random() < self.flood_rate:
+            self.floods += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        if method == "sendMessage":
+            return self._ok(self.send_message(params))
+        if method == "editMessageText":
+            return self._ok(self.edit_message_text(params))
+        return self._ok(True)
+
+    @staticmethod
+    def _ok(result):
+        return web.Response(text=json.dumps({"ok": True, "result": result}), content_type="application/json")
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Serverni ishga tushirib, bazaviy URL'ni qaytarish"""
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.new_updates.set()
+        if self.runner is not None:
+            await self.runner.cleanup()
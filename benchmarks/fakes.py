@@ -0,0 +1,83 @@
+import itertools
+import time
+from contextvars import ContextVar
+
+from aiogram.client.session.base import BaseSession
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+# Benchmark operatori shu qiymatni o'rnatadi: uning update'lariga javob sifatida
+# yuborilgan so'rovlar `FakeSession.user_calls` da sanaladi. Eski xabarlarni
+# o'chirish fonda, boshqa update vaqtida bajariladi, shuning uchun u faqat `calls` da
+current_user = ContextVar("current_user", default=None)
+BACKGROUND_METHODS = {"deleteMessage", "deleteMessages"}
+
+class FakeSession(BaseSession):
+    """Tarmoqsiz Bot API sessiyasi: so'rovlarni sanaydi va soxta javob qaytaradi"""
+
+    def __init__(self, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.calls = {}
+        self.user_calls = {}
+        self.message_ids = itertools.count(10 ** 6)
+
+    async def make_request(self, bot, method, timeout=None):
+        api_method = method.__api_method__
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+        if api_method not in BACKGROUND_METHODS:
+            user_id = current_user.get()
+            self.user_calls[user_id] = self.user_calls.get(user_id, 0) + 1
+        if self.latency:
+            import asyncio
+            await asyncio.sleep(self.latency)
+        if method.__returning__ is Message:
+            chat_id = getattr(method, "chat_id", None) or 1
+            return Message(
+                message_id=next(self.message_ids),
+                date=int(time.time()),
+                chat=Chat(id=chat_id, type="private"),
+                text=getattr(method, "text", None),
+            )
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+_update_ids = itertools.count(1)
+
+def make_update(user_id, text):
+    """Foydalanuvchidan kelgan matnli xabar update'i"""
+    update_id = next(_update_ids)
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=int(time.time()),
+            chat=Chat(id=user_id, type="private"),
+            from_user=User(id=user_id, is_bot=False, first_name="Operator"),
+            text=text,
+        ),
+    )
+
+def make_callback(user_id, data, message_id=1):
+    """Inline tugma bosilgandagi callback_query update'i (panel xabari `message_id`)"""
+    update_id = next(_update_ids)
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=User(id=user_id, is_bot=False, first_name="Operator"),
+            chat_instance="1",
+            data=data,
+            message=Message(
+                message_id=message_id,
+                date=int(time.time()),
+                chat=Chat(id=user_id, type="private"),
+                from_user=User(id=1, is_bot=True, first_name="Bot"),
+                text="🏠 Asosiy menyu",
+            ),
+        ),
+    )
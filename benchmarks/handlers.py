@@ -0,0 +1,219 @@
+"""Handlerlar benchmarki: soxta update'lar haqiqiy `dp` orqali o'tkaziladi.
+
+Bot API tarmoqsiz FakeSession bilan almashtiriladi. Har bir baza hajmi,
+parallellik darajasi va interfeys (reply tugmalar yoki inline panel) uchun
+o'tkazuvchanlik (update/s), p50/p95/p99 handler kechikishi va har bir
+bosqich javobidagi API chaqiruvlari (fondagi o'chirishlarsiz) o'lchanadi;
+natijalar JSON faylga saqlanadi va oldingi natija bilan solishtirish mumkin.
+
+Ishga tushirish:
+    python -m benchmarks.handlers --db-sizes 0,100000 --concurrency 1,20 --ui reply,inline \\
+        --compare benchmarks/results/oldingi.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("MESSAGE_TRACKER_PERSIST", "0")
+os.environ.setdefault("ARCHIVE_AFTER_DAYS", "0")
+
+import bot as app  # noqa: E402
+from config import REGIONS  # noqa: E402
+from database import db, work_day  # noqa: E402
+from benchmarks.fakes import BACKGROUND_METHODS, FakeSession, current_user, make_callback, make_update  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Bitta operatorning to'liq ish oqimi: (bosqich nomi, matn)
+def operator_flow(index, numbers_per_operator):
+    steps = [
+        ("start", "/start"),
+        ("menu", "👤 XODIM"),
+        ("menu", "✏️ Xodim ismi"),
+        ("employee_name", f"Operator {index}"),
+        ("menu", "🏙️ Viloyatlar"),
+        ("region", REGIONS[index % len(REGIONS)]),
+        ("menu", "🔢 Raqam + Izoh"),
+    ]
+    for i in range(numbers_per_operator):
+        steps += [
+            ("menu", "📝 Raqam yozish"),
+            ("phone", f"9{index % 100:02d}{i:06d}"),
+            ("comment", f"izoh {i}"),
+        ]
+    steps += [("today_numbers", "📅 Bugungi ro'yxat"), ("today_pozivnoy", "📅 Bugungi pozivnoylar")]
+    return steps
+
+# Xuddi shu oqim inline panel orqali: (bosqich nomi, matn yoki None, callback_data yoki None)
+def inline_flow(index, numbers_per_operator):
+    steps = [
+        ("start", "/start", None),
+        ("menu", None, "menu:employee"),
+        ("menu", None, "employee:name"),
+        ("employee_name", f"Operator {index}", None),
+        ("menu", None, "employee:regions"),
+        ("region", None, f"region:{REGIONS[index % len(REGIONS)]}"),
+        ("menu", None, "menu:numbers"),
+    ]
+    for i in range(numbers_per_operator):
+        steps += [
+            ("menu", None, "numbers:add"),
+            ("phone", f"9{index % 100:02d}{i:06d}", None),
+            ("comment", f"izoh {i}", None),
+        ]
+    steps += [("today_numbers", None, "numbers:today"), ("menu", None, "menu:pozivnoy"),
+              ("today_pozivnoy", None, "pozivnoy:today")]
+    return steps
+
+def flow_updates(ui, index, numbers_per_operator):
+    """(bosqich nomi, update yaratuvchi) juftlari"""
+    if ui == "inline":
+        return [(step, (lambda user_id, text=text: make_update(user_id, text)) if text is not None
+                 else (lambda user_id, data=data: make_callback(user_id, data)))
+                for step, text, data in inline_flow(index, numbers_per_operator)]
+    return [(step, lambda user_id, text=text: make_update(user_id, text))
+            for step, text in operator_flow(index, numbers_per_operator)]
+
+def seed(rows):
+    """Tarixiy qatorlar qo'shish: boshqa foydalanuvchilar, o'tgan kunlar"""
+    today = datetime.now(timezone.utc)
+    batch = []
+    for i in range(rows):
+        day = work_day(today - timedelta(days=1 + i % 365))
+        batch.append((10 ** 7 + i % 5000, f"+99890{i:07d}", "tarix", REGIONS[i % len(REGIONS)], f"Xodim {i % 5000}", day))
+        if len(batch) == 50000:
+            db.save_batch(numbers=batch)
+            batch = []
+    if batch:
+        db.save_batch(numbers=batch)
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+    }
+
+async def run_case(concurrency, numbers_per_operator, user_base, ui="reply"):
+    latencies = {}
+    api_calls = {}
+    session = app.bot.session
+    session.calls.clear()
+
+    async def operator(index):
+        user_id = user_base + index
+        current_user.set(user_id)
+        for step, make in flow_updates(ui, index, numbers_per_operator):
+            calls = session.user_calls.get(user_id, 0)
+            started = time.perf_counter()
+            await app.dp.feed_update(app.bot, make(user_id))
+            latencies.setdefault(step, []).append(time.perf_counter() - started)
+            api_calls.setdefault(step, []).append(session.user_calls.get(user_id, 0) - calls)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(operator(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    every = [value for values in latencies.values() for value in values]
+    steps = {step: summarize(values) for step, values in sorted(latencies.items())}
+    for step, values in api_calls.items():
+        steps[step]["api_calls"] = round(statistics.fmean(values), 2)
+    return {
+        "ui": ui,
+        "concurrency": concurrency,
+        "updates": len(every),
+        "updates_per_s": round(len(every) / wall, 1),
+        "api_calls_per_update": round(sum(session.calls.values()) / len(every), 2),
+        "delete_calls_per_update": round(sum(session.calls.get(method, 0) for method in BACKGROUND_METHODS)
+                                         / len(every), 2),
+        "all": summarize(every),
+        "steps": steps,
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return None
+
+async def main(args):
+    app.bot.session = FakeSession()
+    results = []
+    seeded = 0
+    user_base = 1
+    for db_size in sorted(args.db_sizes):
+        seed(db_size - seeded)
+        seeded = db_size
+        for ui in args.ui:
+            for concurrency in args.concurrency:
+                case = await run_case(concurrency, args.numbers, user_base, ui)
+                user_base += concurrency
+                case["db_rows"] = db_size
+                results.append(case)
+                print(f"db={db_size:>9} {ui:>6} c={concurrency:>4}: {case['updates_per_s']:>8} update/s  "
+                      f"p50={case['all']['p50_ms']}ms p95={case['all']['p95_ms']}ms p99={case['all']['p99_ms']}ms  "
+                      f"api/update={case['api_calls_per_update']}")
+    await app.dp.emit_shutdown(bot=app.bot)
+    return {
+        "revision": git_revision(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numbers_per_operator": args.numbers,
+        "results": results,
+    }
+
+def compare(report, previous_path):
+    """Oldingi natija bilan solishtirish: o'tkazuvchanlik va p99 o'zgarishi"""
+    with open(previous_path) as f:
+        # "ui" maydoni bo'lmagan eski natijalar reply interfeysiga tegishli
+        previous = {(case["db_rows"], case.get("ui", "reply"), case["concurrency"]): case
+                    for case in json.load(f)["results"]}
+    print(f"\nSolishtirish: {previous_path}")
+    for case in report["results"]:
+        old = previous.get((case["db_rows"], case["ui"], case["concurrency"]))
+        if old is None:
+            continue
+        throughput = (case["updates_per_s"] / old["updates_per_s"] - 1) * 100
+        p99 = (case["all"]["p99_ms"] / old["all"]["p99_ms"] - 1) * 100 if old["all"]["p99_ms"] else 0.0
+        print(f"db={case['db_rows']:>9} {case['ui']:>6} c={case['concurrency']:>4}: "
+              f"update/s {throughput:+.1f}%  p99 {p99:+.1f}%")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    int_list = lambda value: [int(x) for x in value.split(",") if x]  # noqa: E731
+    parser.add_argument("--db-sizes", type=int_list, default=[0, 100000], help="tarixiy qatorlar soni")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 10, 50], help="bir vaqtdagi operatorlar")
+    parser.add_argument("--numbers", type=int, default=5, help="har bir operator kiritadigan raqamlar")
+    parser.add_argument("--ui", type=lambda value: [x for x in value.split(",") if x], default=["reply", "inline"],
+                        help="interfeyslar: reply, inline")
+    parser.add_argument("--output", help="natija fayli (standart: benchmarks/results/<vaqt>.json)")
+    parser.add_argument("--compare", help="solishtirish uchun oldingi natija fayli")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    args = parse_args(sys.argv[1:])
+    report = asyncio.run(main(args))
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nNatija saqlandi: {output}")
+    if args.compare:
+        compare(report, args.compare)
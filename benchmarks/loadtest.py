@@ -0,0 +1,201 @@
+"""End-to-end yuklama testi: o'zgartirilmagan `bot.py` (yoki `workers.py`)
+lokal soxta Bot API serveriga qarshi alohida jarayonda ishga tushiriladi.
+
+Yuzlab operatorlar bir vaqtda raqam va pozivnoy kiritish oqimlarini
+bajaradi: har bir xabardan keyin bot javobini kutadi. Natijada update/s,
+javob kechikishi (p50/p95/p99), update boshiga API chaqiruvlari va baza
+hajmining o'sishi chiqariladi. Tarmoqqa chiqilmaydi.
+
+Ishga tushirish:
+    python -m benchmarks.loadtest --operators 200 --rounds 5 --latency 0.02 --flood-rate 0.01
+
+Standart sozlamalarda o'tkazuvchanlikni botning RATE_LIMIT_GLOBAL (Telegram
+limiti) cheklaydi; botning o'z imkoniyatini o'lchash uchun:
+    python -m benchmarks.loadtest --env RATE_LIMIT_GLOBAL=100000 --env RATE_LIMIT_PER_CHAT=1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_api import FakeBotAPI
+from config import REGIONS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMENTS = ["qayta qo'ng'iroq", "javob bermadi", "band", "rozi", "ertaga qo'ng'iroq", "o'chirilgan", "keyinroq"]
+
+def operator_flow(user_id, rounds, rng):
+    """Bitta operatorning xabarlari: profil, keyin raqam va pozivnoy kiritish"""
+    yield "/start"
+    yield "👤 XODIM"
+    yield "✏️ Xodim ismi"
+    yield f"Operator {user_id}"
+    yield "🏙️ Viloyatlar"
+    yield rng.choice(REGIONS)
+    for _ in range(rounds):
+        yield "🔢 Raqam + Izoh"
+        for _ in range(3):
+            yield "📝 Raqam yozish"
+            yield f"9{rng.randrange(10 ** 8):08d}"
+            yield rng.choice(COMMENTS)
+        yield "📅 Bugungi ro'yxat"
+        yield "🚖 Pozivnoylar"
+        yield "📝 Pozivnoy qo'shish"
+        yield f"9{rng.randrange(10 ** 8):08d}"
+        yield "📅 Bugungi pozivnoylar"
+        yield "🔙 Asosiy menyu"
+
+async def run_operator(api, user_id, rounds, think, reply_timeout, latencies, stats):
+    rng = random.Random(user_id)
+    for text in operator_flow(user_id, rounds, rng):
+        reply = api.wait_reply(user_id)
+        started = time.perf_counter()
+        api.push_text(user_id, text)
+        stats["updates"] += 1
+        try:
+            latencies.append(await asyncio.wait_for(reply, reply_timeout) - started)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+async def collect_log(stream, tail, counters):
+    """Bot logini o'qib turish (pipe to'lib qolmasligi uchun), xatolarni sanash"""
+    async for line in stream:
+        text = line.decode(errors="replace").rstrip()
+        if text.startswith(("ERROR", "CRITICAL")):
+            counters["errors"] += 1
+        tail.append(text)
+        del tail[:-50]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def db_stats(path):
+    """Bazaning mantiqiy hajmi (WAL bilan birga, bo'sh sahifalarsiz) va qatorlar soni"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        pages = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        size = pages * conn.execute("PRAGMA page_size").fetchone()[0]
+        rows = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("numbers", "pozivnoy")}
+        return size, rows
+    finally:
+        conn.close()
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+async def start_bot(api_url, db_path, workers, extra_env):
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": "123456:FAKE-TOKEN",
+        "TELEGRAM_API_URL": api_url,
+        "BOT_MODE": "polling",
+        "DB_PATH": db_path,
+        "ARCHIVE_DIR": os.path.join(os.path.dirname(db_path), "archive"),
+        "METRICS_PORT": str(free_port()),
+        "WORKERS": str(workers),
+    })
+    env.update(extra_env)
+    script = "workers.py" if workers > 1 else "bot.py"
+    return await asyncio.create_subprocess_exec(
+        sys.executable, script, cwd=ROOT, env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+    )
+
+async def main(args):
+    directory = tempfile.mkdtemp(prefix="loadtest_")
+    db_path = os.path.join(directory, "bot.db")
+    api = FakeBotAPI(latency=args.latency, flood_rate=args.flood_rate, seed=1)
+    api_url = await api.start()
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    process = await start_bot(api_url, db_path, args.workers, extra_env)
+    log_tail, log_counters = [], {"errors": 0}
+    log_task = asyncio.create_task(collect_log(process.stderr, log_tail, log_counters))
+    try:
+        await asyncio.wait_for(api.polling.wait(), args.startup_timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await log_task
+        raise SystemExit("Bot ishga tushmadi:\n" + "\n".join(log_tail))
+    size_before, _ = db_stats(db_path)
+    calls_before = dict(api.calls)
+
+    latencies = []
+    stats = {"updates": 0, "timeouts": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_operator(api, 10 ** 6 + i, args.rounds, args.think, args.reply_timeout, latencies, stats)
+        for i in range(args.operators)
+    ))
+    elapsed = time.perf_counter() - started
+
+    # Bot to'xtatiladi (SIGINT): navbatdagi yozuvlar va holatlar saqlanadi
+    process.send_signal(signal.SIGINT)
+    await process.wait()
+    await log_task
+    await api.stop()
+
+    calls = {method: count - calls_before.get(method, 0) for method, count in api.calls.items()}
+    calls.pop("getUpdates", None)
+    calls.pop("getMe", None)
+    api_calls = sum(calls.values())
+    size_after, rows = db_stats(db_path)
+    report = {
+        "operators": args.operators,
+        "workers": args.workers,
+        "latency_injected_s": args.latency,
+        "flood_rate": args.flood_rate,
+        "updates": stats["updates"],
+        "reply_timeouts": stats["timeouts"],
+        "seconds": round(elapsed, 2),
+        "updates_per_s": round(stats["updates"] / elapsed, 1),
+        "reply_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies, default=0) * 1000, 1),
+            "mean": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "api_calls_per_update": round(api_calls / max(stats["updates"], 1), 2),
+        "api_calls": dict(sorted(calls.items())),
+        "injected_429": api.floods,
+        "db_rows": rows,
+        "db_growth_bytes": size_after - size_before,
+        "db_bytes_per_update": round((size_after - size_before) / max(stats["updates"], 1), 1),
+        "bot_errors": log_counters["errors"],
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operators", type=int, default=200, help="bir vaqtdagi operatorlar")
+    parser.add_argument("--rounds", type=int, default=3, help="har bir operatorning kiritish sikllari")
+    parser.add_argument("--workers", type=int, default=1, help=">1 bo'lsa workers.py ishga tushiriladi")
+    parser.add_argument("--latency", type=float, default=0.0, help="har bir API javobiga kechikish (soniya)")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="429 qaytariladigan so'rovlar ulushi")
+    parser.add_argument("--think", type=float, default=0.0, help="operator xabarlari orasidagi o'rtacha pauza")
+    parser.add_argument("--reply-timeout", type=float, default=30.0)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--env", action="append", default=[], help="bot jarayoniga qo'shimcha KEY=VALUE")
+    parser.add_argument("--output", help="natijani JSON faylga yozish")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args(sys.argv[1:])))
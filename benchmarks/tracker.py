@@ -0,0 +1,74 @@
+"""MessageTracker xotira tekshiruvi: 100k chat uchun tracemalloc o'lchovi.
+
+Tracker to'ldiriladi, xotira `dump_changes()` dan oldin (barcha chatlar
+saqlanishni kutmoqda) va keyin o'lchanadi. Byudjetdan oshsa yoki chat/id
+limitlari ishlamasa nolmas kod bilan chiqadi.
+
+Ishga tushirish: python -m benchmarks.tracker --chats 100000 --per-chat 3
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from tracker import MessageTracker
+
+MB = 1024 * 1024
+
+def measure(chats, per_chat):
+    """(dump_changes'dan oldin, keyin) ajratilgan xotira baytlarda"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracker = MessageTracker()
+    now = int(time.time())
+    for chat_id in range(10 ** 9, 10 ** 9 + chats):
+        for i in range(per_chat):
+            tracker.add(chat_id, chat_id % 10 ** 6 * 100 + i, now)
+    before = tracemalloc.get_traced_memory()[0] - baseline
+    rows, _ = tracker.dump_changes()
+    del rows
+    after = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    assert len(tracker) == min(chats, tracker.max_chats)
+    return before, after
+
+def check_limits():
+    """Chat ichidagi id limiti va chatlar soni limiti"""
+    now = int(time.time())
+    tracker = MessageTracker(max_per_chat=5, max_chats=100)
+    overflow = []
+    for message_id in range(12):
+        overflow += tracker.add(1, message_id, now)
+    assert [message_id for message_id, _ in overflow] == list(range(7)), overflow
+    assert len(tracker.chats[1]) == 5 * 2
+    for chat_id in range(2, 300):
+        tracker.add(chat_id, 1, now)
+    assert len(tracker) == 100 and 1 not in tracker.chats
+    # Muddati o'tgan chatlar keyingi qo'shishda chiqariladi
+    tracker = MessageTracker(idle_ttl=60)
+    tracker.add(1, 1, now - 120)
+    tracker.add(2, 1, now)
+    assert list(tracker.chats) == [2]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=100000)
+    parser.add_argument("--per-chat", type=int, default=3, help="har bir chatdagi xabar id'lari")
+    parser.add_argument("--budget-mb", type=float, default=32, help="dump_changes'dan oldingi chegara")
+    parser.add_argument("--budget-after-mb", type=float, default=24, help="dump_changes'dan keyingi chegara")
+    args = parser.parse_args(argv)
+
+    check_limits()
+    before, after = measure(args.chats, args.per_chat)
+    print(f"{args.chats} chat x {args.per_chat} id: dump_changes'dan oldin {before / MB:.1f} MB "
+          f"({before / args.chats:.0f} B/chat), keyin {after / MB:.1f} MB ({after / args.chats:.0f} B/chat)")
+    failed = []
+    if before > args.budget_mb * MB:
+        failed.append(f"oldin {before / MB:.1f} MB > {args.budget_mb} MB")
+    if after > args.budget_after_mb * MB:
+        failed.append(f"keyin {after / MB:.1f} MB > {args.budget_after_mb} MB")
+    if failed:
+        raise SystemExit("Xotira byudjetidan oshdi: " + ", ".join(failed))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
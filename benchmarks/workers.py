@@ -0,0 +1,79 @@
+"""Ko'p jarayonli rejimning masshtablanishi: lokal soxta update manbai.
+
+Update'lar front jarayondagi kabi `route` orqali workerlarga taqsimlanadi;
+workerlarda Bot API FakeSession bilan almashtiriladi. Har bir workerlar
+soni uchun barcha update'lar qayta ishlanguncha ketgan vaqt o'lchanadi.
+
+Ishga tushirish:
+    python -m benchmarks.workers --workers 1,2,4 --users 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("MESSAGE_TRACKER_PERSIST", "0")
+os.environ.setdefault("ARCHIVE_AFTER_DAYS", "0")
+os.environ.setdefault("METRICS_ENABLED", "0")
+
+from benchmarks.fakes import FakeSession, make_update  # noqa: E402
+from workers import route, serve, start_workers, stop_workers  # noqa: E402
+
+# Ketma-ketligi muhim bo'lmagan (FSM holatiga bog'liq bo'lmagan) xabarlar
+TEXTS = ["/start", "🔢 Raqam + Izoh", "📅 Bugungi ro'yxat", "🏙️ Viloyatlar", "Andijon", "🔙 Asosiy menyu"]
+
+def bench_worker(updates_queue, events):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.disable(logging.INFO)
+    asyncio.run(_serve(updates_queue, events))
+
+async def _serve(updates_queue, events):
+    import bot as app
+    app.bot.session = FakeSession()
+    processed = await serve(updates_queue, on_ready=lambda: events.put("ready"))
+    events.put(processed)
+
+def make_updates(users, rounds):
+    return [
+        make_update(user_id, text).model_dump(mode="json", by_alias=True, exclude_none=True)
+        for _ in range(rounds) for text in TEXTS for user_id in range(1, users + 1)
+    ]
+
+def run(count, updates, batch_size=100):
+    import multiprocessing
+    events = multiprocessing.get_context("spawn").Queue()
+    queues, processes = start_workers(count, target=bench_worker, args=(events,))
+    for _ in processes:
+        events.get()
+    started = time.perf_counter()
+    for i in range(0, len(updates), batch_size):
+        route(updates[i:i + batch_size], queues)
+    for updates_queue in queues:
+        updates_queue.put(None)
+    processed = sum(events.get() for _ in processes)
+    elapsed = time.perf_counter() - started
+    stop_workers([], processes)
+    return processed, elapsed
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="workerlar soni (vergul bilan)")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args(argv)
+    updates = make_updates(args.users, args.rounds)
+    print(f"CPU yadrolari: {os.cpu_count()}, update'lar: {len(updates)}")
+    baseline = None
+    for count in (int(x) for x in args.workers.split(",")):
+        processed, elapsed = run(count, updates)
+        throughput = processed / elapsed
+        baseline = baseline or throughput
+        print(f"workers={count:>2}: {throughput:>8.0f} update/s  (x{throughput / baseline:.2f})")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
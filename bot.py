@@ -1,32 +1,70 @@
 import asyncio
 import logging
+import shlex
+import shutil
+import tempfile
+import time
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+from aiogram.filters import Command, CommandObject
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import (
+    FSInputFile, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove,
+    InlineKeyboardMarkup, InlineKeyboardButton,
+)
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.storage.memory import MemoryStorage
 from datetime import datetime
 
-from config import BOT_TOKEN, REGIONS
-from database import db
+from config import (
+    ADMIN_IDS, ARCHIVE_AFTER_DAYS, BOT_TOKEN, BOT_MODE, FSM_STORAGE, REGIONS, TIMEZONE,
+    MESSAGE_DELETE_MAX_AGE, MESSAGE_TRACKER_PERSIST, MESSAGE_TRACKER_FLUSH_INTERVAL,
+    METRICS_ENABLED, METRICS_LOG_INTERVAL, UI_MODE, WORKER_INDEX,
+)
+from archive import archive_periodically
+from cleanup import MessageCleaner
+from database import async_db, search_cursor, work_day
+from duplicates import duplicates, format_owners
+from export import EXPORT_FORMATS, export_tables, xlsx_available
+from metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware, log_metrics_periodically, start_metrics_server
+from middlewares import ProfileMiddleware, profile_cache
+from phones import parse_bulk_numbers, parse_phone
+from ratelimit import RateLimiter
+from render import chunk_lines
+from search import parse_search_term
+from session import BotSession
+from sharding import owns_user
+from storage import SQLiteStorage
+from tracker import MessageTracker
+from webhook import run_webhook
 
 # Log konfiguratsiyasi
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Bot va dispatcher
-bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
+bot = Bot(token=BOT_TOKEN, session=BotSession())
+bot.session.middleware(RateLimiter())
+storage = SQLiteStorage() if FSM_STORAGE == "sqlite" else MemoryStorage()
 dp = Dispatcher(storage=storage)
+dp.message.outer_middleware(ProfileMiddleware())
+dp.callback_query.outer_middleware(ProfileMiddleware())
 
-# Xabarlarni saqlash uchun
-user_messages = {}
+# Metrikalar: API so'rovlari (RateLimiter ichida, har bir urinish) va handlerlar vaqti
+if METRICS_ENABLED:
+    bot.session.middleware(ApiMetricsMiddleware())
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+# Xabarlarni saqlash va fonda o'chirish uchun
+tracker = MessageTracker()
+cleaner = MessageCleaner(bot)
 
 # FSM holatlari
 class NumberState(StatesGroup):
     waiting_for_phone = State()
     waiting_for_comment = State()
+    waiting_for_bulk = State()
 
 class PozivnoyState(StatesGroup):
     waiting_for_pozivnoy = State()
@@ -34,90 +72,189 @@ class PozivnoyState(StatesGroup):
 class EmployeeState(StatesGroup):
     waiting_for_name = State()
 
-# Klaviaturalar
-def get_main_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🔢 Raqam + Izoh"), KeyboardButton(text="🚖 Pozivnoylar")],
-            [KeyboardButton(text="👤 XODIM")]
-        ],
-        resize_keyboard=True
-    )
-
-def get_numbers_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📝 Raqam yozish")],
-            [KeyboardButton(text="📅 Bugungi ro'yxat")],
-            [KeyboardButton(text="🔙 Asosiy menyu")]
-        ],
-        resize_keyboard=True
-    )
-
-def get_pozivnoy_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📝 Pozivnoy qo'shish")],
-            [KeyboardButton(text="📅 Bugungi pozivnoylar")],
-            [KeyboardButton(text="🔙 Asosiy menyu")]
-        ],
-        resize_keyboard=True
-    )
-
-def get_employee_menu():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="✏️ Xodim ismi"), KeyboardButton(text="🏙️ Viloyatlar")],
-            [KeyboardButton(text="🔙 Asosiy menyu")]
-        ],
-        resize_keyboard=True
-    )
-
-def get_regions_keyboard():
-    keyboard = []
-    for i in range(0, len(REGIONS), 2):
-        row = REGIONS[i:i+2]
-        keyboard.append([KeyboardButton(text=region) for region in row])
-    keyboard.append([KeyboardButton(text="🔙 Asosiy menyu")])
-    return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
+# Klaviaturalar (import vaqtida bir marta quriladi va qayta ishlatiladi)
+MAIN_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="🔢 Raqam + Izoh"), KeyboardButton(text="🚖 Pozivnoylar")],
+        [KeyboardButton(text="👤 XODIM")]
+    ],
+    resize_keyboard=True
+)
+
+NUMBERS_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📝 Raqam yozish"), KeyboardButton(text="📋 Ko'p raqam")],
+        [KeyboardButton(text="📅 Bugungi ro'yxat")],
+        [KeyboardButton(text="🔙 Asosiy menyu")]
+    ],
+    resize_keyboard=True
+)
+
+POZIVNOY_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📝 Pozivnoy qo'shish")],
+        [KeyboardButton(text="📅 Bugungi pozivnoylar")],
+        [KeyboardButton(text="🔙 Asosiy menyu")]
+    ],
+    resize_keyboard=True
+)
+
+EMPLOYEE_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="✏️ Xodim ismi"), KeyboardButton(text="🏙️ Viloyatlar")],
+        [KeyboardButton(text="🔙 Asosiy menyu")]
+    ],
+    resize_keyboard=True
+)
+
+REGIONS_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=region) for region in REGIONS[i:i+2]]
+        for i in range(0, len(REGIONS), 2)
+    ] + [[KeyboardButton(text="🔙 Asosiy menyu")]],
+    resize_keyboard=True
+)
+
+BACK_MENU = ReplyKeyboardMarkup(
+    keyboard=[[KeyboardButton(text="🔙 Asosiy menyu")]],
+    resize_keyboard=True
+)
+
+REMOVE_KEYBOARD = ReplyKeyboardRemove()
+
+# Inline interfeys klaviaturalari: tugmalar bitta panel xabarini tahrirlaydi
+def inline_keyboard(rows):
+    """[(matn, callback_data), ...] qatorlaridan inline klaviatura"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=text, callback_data=data) for text, data in row] for row in rows
+    ])
+
+BACK_BUTTON = ("🔙 Asosiy menyu", "menu:main")
+
+MAIN_INLINE = inline_keyboard([
+    [("🔢 Raqam + Izoh", "menu:numbers"), ("🚖 Pozivnoylar", "menu:pozivnoy")],
+    [("👤 XODIM", "menu:employee")],
+])
+
+NUMBERS_INLINE = inline_keyboard([
+    [("📝 Raqam yozish", "numbers:add"), ("📋 Ko'p raqam", "numbers:bulk")],
+    [("📅 Bugungi ro'yxat", "numbers:today")],
+    [BACK_BUTTON],
+])
+
+POZIVNOY_INLINE = inline_keyboard([
+    [("📝 Pozivnoy qo'shish", "pozivnoy:add")],
+    [("📅 Bugungi pozivnoylar", "pozivnoy:today")],
+    [BACK_BUTTON],
+])
+
+EMPLOYEE_INLINE = inline_keyboard([
+    [("✏️ Xodim ismi", "employee:name"), ("🏙️ Viloyatlar", "employee:regions")],
+    [BACK_BUTTON],
+])
+
+REGIONS_INLINE = inline_keyboard([
+    [(region, f"region:{region}") for region in REGIONS[i:i+2]]
+    for i in range(0, len(REGIONS), 2)
+] + [[BACK_BUTTON]])
+
+BACK_INLINE = inline_keyboard([[BACK_BUTTON]])
+
+PROFILE_REQUIRED = "❌ Avval XODIM bo'limida ismingiz va viloyatingizni tanlashingiz kerak!"
 
 # Avtomatik o'chirish funksiyalari
-async def save_message_id(user_id, message_id, is_bot_message=False):
-    """Foydalanuvchi xabarlarini saqlash"""
-    if user_id not in user_messages:
-        user_messages[user_id] = {'user': [], 'bot': []}
-    
-    if is_bot_message:
-        user_messages[user_id]['bot'].append(message_id)
-    else:
-        user_messages[user_id]['user'].append(message_id)
+async def save_message_id(user_id, message_id):
+    """Bot xabarini saqlash (chat limitidan oshganlari o'chiriladi)"""
+    for msg_id, sent_at in tracker.add(user_id, message_id):
+        cleaner.schedule(user_id, msg_id, sent_at)
+
+def discard_user_message(message: types.Message):
+    """Foydalanuvchi xabarini fonda o'chirish"""
+    cleaner.schedule(message.chat.id, message.message_id, message.date.timestamp())
 
 async def delete_previous_messages(user_id):
-    """Oldingi xabarlarni o'chirish"""
-    if user_id in user_messages:
+    """Oldingi bot xabarlarini (oxirgisidan tashqari) o'chirish navbatiga qo'yish"""
+    for msg_id, sent_at in tracker.pop_stale(user_id):
+        cleaner.schedule(user_id, msg_id, sent_at)
+
+async def answer_chunks(message: types.Message, chunks, reply_markup, user_id=None):
+    """Matn bo'laklarini ketma-ket yuborish; klaviatura oxirgi xabarga biriktiriladi"""
+    user_id = user_id or message.from_user.id
+    previous = None
+    async for chunk in chunks:
+        if previous is not None:
+            msg = await message.answer(previous)
+            await save_message_id(user_id, msg.message_id)
+        previous = chunk
+    msg = await message.answer(previous, reply_markup=reply_markup)
+    await save_message_id(user_id, msg.message_id)
+
+async def edit_panel(chat_id, message_id, text, reply_markup):
+    """Panel xabarini tahrirlash; xabar topilmasa False"""
+    try:
+        await bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        # Bir xil matn va tugmalar bilan qayta bosilganda Telegram xato qaytaradi
+        if "message is not modified" in e.message:
+            return True
+        logger.warning(f"Panel xabarini tahrirlab bo'lmadi ({chat_id}): {e.message}")
+        return False
+    return True
+
+async def respond(message: types.Message, state: FSMContext, text, reply_markup, inline_markup):
+    """Kiritilgan matnga javob: inline rejimda panel tahrirlanadi, aks holda yangi xabar"""
+    panel = (await state.get_data()).get("panel")
+    if panel is not None and await edit_panel(message.chat.id, panel, text, inline_markup):
+        return
+    msg = await message.answer(text, reply_markup=inline_markup if panel is not None else reply_markup)
+    await save_message_id(message.from_user.id, msg.message_id)
+
+async def show_chunks(callback: types.CallbackQuery, chunks, reply_markup):
+    """Hisobotni panelda ko'rsatish; bir xabarga sig'masa bo'laklar yangi
+    xabarlar bo'lib yuboriladi va oxirgisi yangi panelga aylanadi"""
+    chunks = aiter(chunks)
+    first = await anext(chunks)
+    second = await anext(chunks, None)
+    panel = callback.message
+    if second is None and await edit_panel(panel.chat.id, panel.message_id, first, reply_markup):
+        return
+    
+    async def all_chunks():
+        yield first
+        if second is not None:
+            yield second
+            async for chunk in chunks:
+                yield chunk
+    
+    await answer_chunks(panel, all_chunks(), reply_markup, user_id=callback.from_user.id)
+    cleaner.schedule(panel.chat.id, panel.message_id, panel.date.timestamp())
+
+async def persist_tracker():
+    """Kuzatuvchidagi o'zgarishlarni SQLite'ga yozish"""
+    rows, removed = tracker.dump_changes()
+    if rows or removed:
+        await async_db.save_tracked_messages(rows, removed)
+
+async def persist_tracker_periodically():
+    while True:
+        await asyncio.sleep(MESSAGE_TRACKER_FLUSH_INTERVAL)
         try:
-            # Foydalanuvchi xabarlarini o'chirish
-            for msg_id in user_messages[user_id]['user']:
-                try:
-                    await bot.delete_message(user_id, msg_id)
-                except Exception as e:
-                    logger.debug(f"Foydalanuvchi xabarini o'chirishda xato: {e}")
-            
-            # Bot xabarlarini o'chirish (oxirgisini qoldiramiz)
-            if len(user_messages[user_id]['bot']) > 1:
-                for msg_id in user_messages[user_id]['bot'][:-1]:
-                    try:
-                        await bot.delete_message(user_id, msg_id)
-                    except Exception as e:
-                        logger.debug(f"Bot xabarini o'chirishda xato: {e}")
-            
-            # Faqat oxirgi bot xabarini saqlaymiz
-            if user_messages[user_id]['bot']:
-                user_messages[user_id]['bot'] = [user_messages[user_id]['bot'][-1]]
-            user_messages[user_id]['user'] = []
-            
+            await persist_tracker()
         except Exception as e:
-            logger.error(f"Xabarlarni o'chirishda xato: {e}")
+            logger.error(f"Xabarlar kuzatuvchisini saqlashda xato: {e}")
+
+# Ko'p raqam kiritishda javobda ko'rsatiladigan xato qatorlar soni
+BULK_REJECTED_SHOWN = 30
+
+# Menyu tugmalari: tugma matni -> handler
+MENU_HANDLERS = {}
+
+def menu_button(text):
+    """Handlerni menyu tugmasi matniga bog'lash"""
+    def register(handler):
+        MENU_HANDLERS[text] = handler
+        return handler
+    return register
 
 # Start komandasi
 @dp.message(Command("start"))
@@ -130,317 +267,518 @@ async def cmd_start(message: types.Message, state: FSMContext):
     username = message.from_user.username
     full_name = message.from_user.full_name
     
-    db.save_user_settings(user_id, username, full_name)
+    if await async_db.save_user_settings(user_id, username, full_name):
+        profile_cache.invalidate(user_id)
     
-    # Foydalanuvchi xabarini saqlash va o'chirish
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    # Foydalanuvchi xabarini o'chirish
+    discard_user_message(message)
     
-    # Asosiy menyuni yuborish
+    # Asosiy menyuni yuborish (inline rejimda bu xabar panelga aylanadi)
     msg = await message.answer(
         "🏠 Asosiy menyu",
-        reply_markup=get_main_menu()
+        reply_markup=MAIN_INLINE if UI_MODE == "inline" else MAIN_MENU
     )
-    await save_message_id(user_id, msg.message_id, True)
+    await save_message_id(user_id, msg.message_id)
+
+# Admin buyruqlari
+def parse_day(text):
+    """Sanani (YYYY-MM-DD yoki DD.MM.YYYY) ish kuni formatiga keltirish; xato bo'lsa None"""
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return None
+
+@dp.message(Command("stats"), F.from_user.id.in_(ADMIN_IDS))
+async def cmd_stats(message: types.Message, command: CommandObject):
+    user_id = message.from_user.id
+    await delete_previous_messages(user_id)
+    
+    discard_user_message(message)
+    
+    day = parse_day(command.args.strip()) if command.args else work_day()
+    if day is None:
+        msg = await message.answer("❌ Sana formati: /stats 2024-01-31 yoki /stats 31.01.2024")
+        await save_message_id(user_id, msg.message_id)
+        return
+    
+    rows = await async_db.get_daily_stats(day)
+    await answer_chunks(message, chunk_lines(stats_report_lines(rows, day)), MAIN_MENU)
+
+def stats_report_lines(rows, day):
+    """daily_stats qatorlaridan viloyat va xodimlar kesimidagi hisobot"""
+    shown_day = datetime.strptime(day, "%Y-%m-%d").strftime("%d.%m.%Y")
+    yield f"📊 KUNLIK STATISTIKA ({shown_day})\n\n"
+    if not rows:
+        yield "Hech qanday ma'lumot yo'q."
+        return
+    
+    # Qatorlar viloyat bo'yicha tartiblangan: har bir viloyat uchun jami va xodimlar
+    total_numbers = sum(row[2] for row in rows)
+    total_pozivnoy = sum(row[3] for row in rows)
+    yield f"Jami: 🔢 {total_numbers} | 🚖 {total_pozivnoy}\n"
+    region_rows = {}
+    for region, employee_name, numbers_count, pozivnoy_count in rows:
+        region_rows.setdefault(region, []).append((employee_name, numbers_count, pozivnoy_count))
+    for region, employees in region_rows.items():
+        yield (f"\n🏙️ {region or '—'}: 🔢 {sum(e[1] for e in employees)}"
+               f" | 🚖 {sum(e[2] for e in employees)}\n")
+        for employee_name, numbers_count, pozivnoy_count in employees:
+            yield f"   • {employee_name or '—'}: 🔢 {numbers_count} | 🚖 {pozivnoy_count}\n"
+
+EXPORT_USAGE = (
+    "📤 Eksport: /export [sana_dan] [sana_gacha] [viloyat=...] [xodim=\"...\"] [csv|xlsx]\n\n"
+    "Namuna: /export 01.10.2024 31.10.2024 viloyat=Andijon xlsx"
+)
+
+def parse_export_args(args):
+    """`/export` argumentlari: (sana_dan, sana_gacha, viloyat, xodim, format); xato bo'lsa None"""
+    try:
+        tokens = shlex.split(args or "")
+    except ValueError:
+        return None
+    days = []
+    region = employee_name = None
+    fmt = "csv"
+    for token in tokens:
+        key, _, value = token.partition("=")
+        if key == "viloyat" and value:
+            region = value
+        elif key == "xodim" and value:
+            employee_name = value
+        elif token in EXPORT_FORMATS:
+            fmt = token
+        elif (day := parse_day(token)) is not None and len(days) < 2:
+            days.append(day)
+        else:
+            return None
+    day_from = days[0] if days else work_day()
+    day_to = days[1] if len(days) > 1 else day_from
+    return day_from, day_to, region, employee_name, fmt
+
+@dp.message(Command("export"), F.from_user.id.in_(ADMIN_IDS))
+async def cmd_export(message: types.Message, command: CommandObject):
+    discard_user_message(message)
+    
+    parsed = parse_export_args(command.args)
+    if parsed is None:
+        await message.answer(EXPORT_USAGE)
+        return
+    day_from, day_to, region, employee_name, fmt = parsed
+    if fmt == "xlsx" and not xlsx_available():
+        await message.answer("❌ XLSX eksport uchun openpyxl o'rnatilmagan, csv ishlating.")
+        return
+    
+    # Fayllar vaqtinchalik papkaga oqim bilan yoziladi va yuborilgach o'chiriladi
+    directory = tempfile.mkdtemp(prefix="export_")
+    try:
+        files = await export_tables(directory, fmt, day_from, day_to, region, employee_name)
+        for path, count in files:
+            await message.answer_document(FSInputFile(path), caption=f"📤 {count} ta qator")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+SEARCH_USAGE = (
+    "🔎 Qidiruv: /search <raqam yoki izoh> [viloyat=...] [xodim=\"...\"]\n\n"
+    "/search +99890123 — raqam boshi bo'yicha\n"
+    "/search 4567 — raqam oxiri bo'yicha\n"
+    "/search qayta qo'ng'iroq viloyat=Andijon — izohdagi so'zlar bo'yicha"
+)
+
+# Qidiruv natijalarining bitta sahifasi (xabar 4096 belgidan oshmasligi uchun)
+SEARCH_PAGE_SIZE = 10
+SEARCH_COMMENT_SHOWN = 200
+SEARCH_NEXT_INLINE = inline_keyboard([[("➡️ Keyingi", "search:next")]])
+
+def parse_search_args(args):
+    """`/search` argumentlari: (so'rov, viloyat, xodim); xato bo'lsa None.
+
+    Tirnoq sifatida faqat qo'shtirnoq olinadi: izohlardagi apostrof
+    (qo'ng'iroq) so'zning qismi bo'lib qoladi.
+    """
+    lexer = shlex.shlex(args or "", posix=True)
+    lexer.quotes = '"'
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    words = []
+    region = employee_name = None
+    for token in tokens:
+        key, _, value = token.partition("=")
+        if key == "viloyat" and value:
+            region = value
+        elif key == "xodim" and value:
+            employee_name = value
+        else:
+            words.append(token)
+    term = parse_search_term(" ".join(words))
+    if term is None:
+        return None
+    return (*term, region, employee_name)
+
+async def search_page(search):
+    """Qidiruvning navbatdagi sahifasi: (matn, tugmalar); `search` holati yangilanadi"""
+    mode, term, region, employee_name, after, page = search
+    rows = await async_db.search_numbers(mode, term, region, employee_name, after, SEARCH_PAGE_SIZE + 1)
+    has_next = len(rows) > SEARCH_PAGE_SIZE
+    rows = rows[:SEARCH_PAGE_SIZE]
+    if not rows:
+        return "🔎 Hech narsa topilmadi.", None
+    search[4], search[5] = search_cursor(mode, rows[-1]), page + 1
+    
+    lines = [f"🔎 QIDIRUV NATIJALARI ({page}-sahifa)\n"]
+    for row in rows:
+        shown_day = datetime.strptime(row['day'], "%Y-%m-%d").strftime("%d.%m.%Y")
+        comment = (row['comment'] or "")[:SEARCH_COMMENT_SHOWN]
+        lines.append(f"📞 {row['phone']} — {comment}\n"
+                     f"👤 {row['employee_name'] or '—'} ({row['region'] or '—'}), {shown_day}\n")
+    return "\n".join(lines), SEARCH_NEXT_INLINE if has_next else None
+
+@dp.message(Command("search"), F.from_user.id.in_(ADMIN_IDS))
+async def cmd_search(message: types.Message, command: CommandObject, state: FSMContext):
+    user_id = message.from_user.id
+    discard_user_message(message)
+    
+    parsed = parse_search_args(command.args)
+    if parsed is None:
+        msg = await message.answer(SEARCH_USAGE)
+        await save_message_id(user_id, msg.message_id)
+        return
+    
+    # Qidiruv holati keyingi sahifalar uchun FSM ma'lumotlarida saqlanadi
+    search = [*parsed, None, 1]
+    text, reply_markup = await search_page(search)
+    await state.update_data(search=search)
+    msg = await message.answer(text, reply_markup=reply_markup)
+    await save_message_id(user_id, msg.message_id)
+
+@dp.callback_query(F.data == "search:next", F.from_user.id.in_(ADMIN_IDS))
+async def search_next_page(callback: types.CallbackQuery, state: FSMContext):
+    search = (await state.get_data()).get("search")
+    # Oldingi versiyada kalit faqat id edi (ro'yxat emas)
+    if search is None or not isinstance(search[4], (list, type(None))):
+        await callback.answer("⌛ Qidiruv eskirgan, /search ni qayta yuboring")
+        return
+    text, reply_markup = await search_page(search)
+    await state.update_data(search=search)
+    await edit_panel(callback.message.chat.id, callback.message.message_id, text, reply_markup)
+    await callback.answer()
+
+# Menyu tugmalarini bitta lug'at orqali yo'naltirish (FSM holatlaridan oldin)
+@dp.message(lambda message: message.text in MENU_HANDLERS)
+async def dispatch_menu(message: types.Message, state: FSMContext, profile: tuple):
+    await MENU_HANDLERS[message.text](message, state, profile)
+
+# Metrikalarda "dispatch_menu" o'rniga tugmaning o'z handleri yoziladi
+dispatch_menu.resolve = lambda message: MENU_HANDLERS.get(message.text)
 
 # Asosiy menyu handlerlari
-@dp.message(F.text == "🔙 Asosiy menyu")
-async def main_menu(message: types.Message, state: FSMContext):
+@menu_button("🔙 Asosiy menyu")
+async def main_menu(message: types.Message, state: FSMContext, profile: tuple):
     await state.clear()
     await delete_previous_messages(message.from_user.id)
     
     # Foydalanuvchi xabarini o'chirish
-    await save_message_id(message.from_user.id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
-    msg = await message.answer("🏠 Asosiy menyu", reply_markup=get_main_menu())
-    await save_message_id(message.from_user.id, msg.message_id, True)
+    msg = await message.answer("🏠 Asosiy menyu", reply_markup=MAIN_MENU)
+    await save_message_id(message.from_user.id, msg.message_id)
 
 # 🔢 Raqam + Izoh bo'limi
-@dp.message(F.text == "🔢 Raqam + Izoh")
-async def numbers_section(message: types.Message, state: FSMContext):
+@menu_button("🔢 Raqam + Izoh")
+async def numbers_section(message: types.Message, state: FSMContext, profile: tuple):
     await state.clear()
     await delete_previous_messages(message.from_user.id)
     
-    await save_message_id(message.from_user.id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
-    msg = await message.answer("🔢 Raqam + Izoh bo'limi", reply_markup=get_numbers_menu())
-    await save_message_id(message.from_user.id, msg.message_id, True)
+    msg = await message.answer("🔢 Raqam + Izoh bo'limi", reply_markup=NUMBERS_MENU)
+    await save_message_id(message.from_user.id, msg.message_id)
 
-@dp.message(F.text == "📝 Raqam yozish")
-async def start_number_input(message: types.Message, state: FSMContext):
+@menu_button("📝 Raqam yozish")
+async def start_number_input(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     await delete_previous_messages(user_id)
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
     # Foydalanuvchi sozlamalarini tekshirish
-    employee_name, region = db.get_user_settings(user_id)
+    employee_name, region = profile
     
     if not employee_name or not region:
         msg = await message.answer(
-            "❌ Avval XODIM bo'limida ismingiz va viloyatingizni tanlashingiz kerak!",
-            reply_markup=get_main_menu()
+            PROFILE_REQUIRED,
+            reply_markup=MAIN_MENU
         )
-        await save_message_id(user_id, msg.message_id, True)
+        await save_message_id(user_id, msg.message_id)
         return
     
     msg = await message.answer(
         "📞 Telefon raqamingizni yuboring:\n\n"
         "Namuna: +998901234567 yoki 901234567",
-        reply_markup=ReplyKeyboardRemove()
+        reply_markup=REMOVE_KEYBOARD
     )
     await state.set_state(NumberState.waiting_for_phone)
-    await save_message_id(user_id, msg.message_id, True)
+    await save_message_id(user_id, msg.message_id)
 
 @dp.message(NumberState.waiting_for_phone)
 async def process_phone(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
     
-    # Foydalanuvchi xabarini saqlash va o'chirish
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
-    
-    phone = message.text.strip()
+    # Foydalanuvchi xabarini o'chirish
+    discard_user_message(message)
     
-    # Telefon raqamini tekshirish
-    if not any(char.isdigit() for char in phone):
-        msg = await message.answer(
+    # Telefon raqamini tekshirish va formatlash
+    formatted_phone = parse_phone(message.text or "")
+    if formatted_phone is None:
+        await respond(
+            message, state,
             "❌ Noto'g'ri telefon raqami formati!\n"
             "Iltimos, raqam yuboring:\n"
             "Namuna: +998901234567 yoki 901234567",
-            reply_markup=ReplyKeyboardRemove()
+            REMOVE_KEYBOARD, BACK_INLINE
         )
-        await save_message_id(user_id, msg.message_id, True)
         return
     
-    # Raqamni formatlash
-    if phone.startswith('+'):
-        formatted_phone = phone
-    else:
-        formatted_phone = f"+998{phone[-9:]}" if len(phone) >= 9 else f"+998{phone}"
-    
     await state.update_data(phone=formatted_phone)
     
-    msg = await message.answer(
-        "💬 Izoh yozing:",
-        reply_markup=ReplyKeyboardRemove()
-    )
+    # Boshqa xodim bugun shu raqamni kiritganmi
+    text = "💬 Izoh yozing:"
+    others = await duplicates.others(formatted_phone, user_id)
+    if others:
+        text = f"⚠️ Bu raqam bugun allaqachon kiritilgan: {format_owners(others)}\n\n{text}"
+    
+    await respond(message, state, text, REMOVE_KEYBOARD, BACK_INLINE)
     await state.set_state(NumberState.waiting_for_comment)
-    await save_message_id(user_id, msg.message_id, True)
 
 @dp.message(NumberState.waiting_for_comment)
-async def process_comment(message: types.Message, state: FSMContext):
+async def process_comment(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     
-    # Foydalanuvchi xabarini saqlash va o'chirish
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    # Foydalanuvchi xabarini o'chirish
+    discard_user_message(message)
     
     comment = message.text.strip()
     data = await state.get_data()
     phone = data['phone']
     
     # Foydalanuvchi ma'lumotlarini olish
-    employee_name, region = db.get_user_settings(user_id)
+    employee_name, region = profile
     
     # Bazaga saqlash
-    db.save_number(user_id, phone, comment, region, employee_name)
+    await async_db.save_number(user_id, phone, comment, region, employee_name)
+    duplicates.add(phone, user_id, employee_name, region)
     
     # Yangi raqam so'rash
-    msg = await message.answer(
+    await respond(
+        message, state,
         f"✅ Raqam saqlandi!\n\n"
         f"📞: {phone}\n"
         f"💬: {comment}\n\n"
         f"Yangi raqam yuboring yoki menyuga qayting:",
-        reply_markup=get_numbers_menu()
+        NUMBERS_MENU, NUMBERS_INLINE
     )
     
     await state.clear()
-    await save_message_id(user_id, msg.message_id, True)
 
-@dp.message(F.text == "📅 Bugungi ro'yxat")
-async def show_today_numbers(message: types.Message, state: FSMContext):
+@menu_button("📋 Ko'p raqam")
+async def start_bulk_input(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     await delete_previous_messages(user_id)
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
-    employee_name, region = db.get_user_settings(user_id)
-    numbers = db.get_today_numbers(user_id)
+    employee_name, region = profile
     
-    today = datetime.now().strftime("%d.%m.%Y")
+    if not employee_name or not region:
+        msg = await message.answer(
+            PROFILE_REQUIRED,
+            reply_markup=MAIN_MENU
+        )
+        await save_message_id(user_id, msg.message_id)
+        return
     
-    if not numbers:
-        text = f"📅 BUGUNGI OBZVON RO'YXATI ({today})\n\nHech qanday raqam qo'shilmagan."
-    else:
-        text = f"📅 BUGUNGI OBZVON RO'YXATI ({today})\n\n"
-        text += f"{region} ✅ Xodim: {employee_name} ✅\n📋 RAQAMLAR RO'YXATI:\n\n"
-        
-        for i, (phone, comment, reg) in enumerate(numbers, 1):
-            text += f"{i}. {phone} — {comment}\n\n"
+    msg = await message.answer(
+        "📋 Raqamlarni izohlari bilan bitta xabarda yuboring, har biri alohida qatorda:\n\n"
+        "901234567 — izoh\n"
+        "+998901112233 — izoh",
+        reply_markup=BACK_MENU
+    )
+    await state.set_state(NumberState.waiting_for_bulk)
+    await save_message_id(user_id, msg.message_id)
+
+@dp.message(NumberState.waiting_for_bulk)
+async def process_bulk_numbers(message: types.Message, state: FSMContext, profile: tuple):
+    user_id = message.from_user.id
+    
+    discard_user_message(message)
+    
+    entries, rejected = parse_bulk_numbers(message.text or "")
+    employee_name, region = profile
+    
+    # Barcha qatorlar bitta tranzaksiyada saqlanadi
+    warnings = []
+    if entries:
+        for phone, _ in entries:
+            others = await duplicates.others(phone, user_id)
+            if others:
+                warnings.append(f"{phone} — {format_owners(others)}")
+        await async_db.save_numbers(user_id, entries, region, employee_name)
+        for phone, _ in entries:
+            duplicates.add(phone, user_id, employee_name, region)
+    
+    lines = [f"✅ {len(entries)} ta raqam saqlandi!"]
+    if warnings:
+        lines.append(f"\n⚠️ Bugun boshqa xodimlarda bor ({len(warnings)}):")
+        lines.extend(warnings[:BULK_REJECTED_SHOWN])
+    if rejected:
+        lines.append(f"\n❌ Qabul qilinmagan qatorlar ({len(rejected)}):")
+        lines.extend(f"{line_no}. {line[:50]}" for line_no, line in rejected[:BULK_REJECTED_SHOWN])
+        if len(rejected) > BULK_REJECTED_SHOWN:
+            lines.append(f"... va yana {len(rejected) - BULK_REJECTED_SHOWN} ta")
+    
+    await respond(message, state, "\n".join(lines), NUMBERS_MENU, NUMBERS_INLINE)
+    
+    await state.clear()
+
+@menu_button("📅 Bugungi ro'yxat")
+async def show_today_numbers(message: types.Message, state: FSMContext, profile: tuple):
+    user_id = message.from_user.id
+    await delete_previous_messages(user_id)
     
-    msg = await message.answer(text, reply_markup=get_numbers_menu())
-    await save_message_id(user_id, msg.message_id, True)
+    discard_user_message(message)
+    
+    today = datetime.now(TIMEZONE).strftime("%d.%m.%Y")
+    lines = numbers_report_lines(async_db.iter_today_numbers(user_id), today, profile)
+    await answer_chunks(message, chunk_lines(lines), NUMBERS_MENU)
+
+async def numbers_report_lines(rows, today, profile):
+    """Bugungi raqamlar hisobotini qatorma-qator hosil qilish"""
+    employee_name, region = profile
+    yield f"📅 BUGUNGI OBZVON RO'YXATI ({today})\n\n"
+    i = 0
+    async for row in rows:
+        if i == 0:
+            yield f"{region} ✅ Xodim: {employee_name} ✅\n📋 RAQAMLAR RO'YXATI:\n\n"
+        i += 1
+        yield f"{i}. {row['phone']} — {row['comment']}\n\n"
+    if i == 0:
+        yield "Hech qanday raqam qo'shilmagan."
 
 # 🚖 Pozivnoylar bo'limi
-@dp.message(F.text == "🚖 Pozivnoylar")
-async def pozivnoy_section(message: types.Message, state: FSMContext):
+@menu_button("🚖 Pozivnoylar")
+async def pozivnoy_section(message: types.Message, state: FSMContext, profile: tuple):
     await state.clear()
     await delete_previous_messages(message.from_user.id)
     
-    await save_message_id(message.from_user.id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
-    msg = await message.answer("🚖 Pozivnoylar bo'limi", reply_markup=get_pozivnoy_menu())
-    await save_message_id(message.from_user.id, msg.message_id, True)
+    msg = await message.answer("🚖 Pozivnoylar bo'limi", reply_markup=POZIVNOY_MENU)
+    await save_message_id(message.from_user.id, msg.message_id)
 
-@dp.message(F.text == "📝 Pozivnoy qo'shish")
-async def start_pozivnoy_input(message: types.Message, state: FSMContext):
+@menu_button("📝 Pozivnoy qo'shish")
+async def start_pozivnoy_input(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     await delete_previous_messages(user_id)
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
     # Foydalanuvchi sozlamalarini tekshirish
-    employee_name, region = db.get_user_settings(user_id)
+    employee_name, region = profile
     
     if not employee_name or not region:
         msg = await message.answer(
-            "❌ Avval XODIM bo'limida ismingiz va viloyatingizni tanlashingiz kerak!",
-            reply_markup=get_main_menu()
+            PROFILE_REQUIRED,
+            reply_markup=MAIN_MENU
         )
-        await save_message_id(user_id, msg.message_id, True)
+        await save_message_id(user_id, msg.message_id)
         return
     
     msg = await message.answer(
         "🚖 Pozivnoy raqamini yuboring:\n\n"
         "Namuna: +998901234567 yoki 901234567",
-        reply_markup=ReplyKeyboardRemove()
+        reply_markup=REMOVE_KEYBOARD
     )
     await state.set_state(PozivnoyState.waiting_for_pozivnoy)
-    await save_message_id(user_id, msg.message_id, True)
+    await save_message_id(user_id, msg.message_id)
 
 @dp.message(PozivnoyState.waiting_for_pozivnoy)
-async def process_pozivnoy(message: types.Message, state: FSMContext):
+async def process_pozivnoy(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
-    
-    pozivnoy_number = message.text.strip()
+    discard_user_message(message)
     
-    # Raqamni tekshirish
-    if not any(char.isdigit() for char in pozivnoy_number):
-        msg = await message.answer(
+    # Raqamni tekshirish va formatlash
+    formatted_number = parse_phone(message.text or "")
+    if formatted_number is None:
+        await respond(
+            message, state,
             "❌ Noto'g'ri raqam formati!\n"
             "Iltimos, raqam yuboring:\n"
             "Namuna: +998901234567 yoki 901234567",
-            reply_markup=ReplyKeyboardRemove()
+            REMOVE_KEYBOARD, BACK_INLINE
         )
-        await save_message_id(user_id, msg.message_id, True)
         return
     
-    # Raqamni formatlash
-    if pozivnoy_number.startswith('+'):
-        formatted_number = pozivnoy_number
-    else:
-        formatted_number = f"+998{pozivnoy_number[-9:]}" if len(pozivnoy_number) >= 9 else f"+998{pozivnoy_number}"
-    
     # Foydalanuvchi ma'lumotlarini olish
-    employee_name, region = db.get_user_settings(user_id)
+    employee_name, region = profile
     
     # Bazaga saqlash
-    db.save_pozivnoy(user_id, formatted_number, region, employee_name)
+    await async_db.save_pozivnoy(user_id, formatted_number, region, employee_name)
     
     # Yangi pozivnoy so'rash
-    msg = await message.answer(
+    await respond(
+        message, state,
         f"✅ Pozivnoy saqlandi!\n\n"
         f"🚖: {formatted_number}\n\n"
         f"Yangi pozivnoy yuboring yoki menyuga qayting:",
-        reply_markup=get_pozivnoy_menu()
+        POZIVNOY_MENU, POZIVNOY_INLINE
     )
     
     await state.clear()
-    await save_message_id(user_id, msg.message_id, True)
 
-@dp.message(F.text == "📅 Bugungi pozivnoylar")
-async def show_today_pozivnoy(message: types.Message, state: FSMContext):
+@menu_button("📅 Bugungi pozivnoylar")
+async def show_today_pozivnoy(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     await delete_previous_messages(user_id)
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
-    
-    employee_name, region = db.get_user_settings(user_id)
-    pozivnoylar = db.get_today_pozivnoy(user_id)
-    
-    today = datetime.now().strftime("%d.%m.%Y")
-    
-    if not pozivnoylar:
-        text = f"📅 BUGUNGI QO'SHILGAN POZIVNOY RO'YXATI ({today})\n\nHech qanday pozivnoy qo'shilmagan."
-    else:
-        text = f"📅 BUGUNGI QO'SHILGAN POZIVNOY RO'YXATI ({today})\n\n"
-        text += f"{region} ✅ Xodim: {employee_name} ✅\n\n"
-        
-        for i, (number, reg) in enumerate(pozivnoylar, 1):
-            text += f"{i}. {number}\n"
-    
-    msg = await message.answer(text, reply_markup=get_pozivnoy_menu())
-    await save_message_id(user_id, msg.message_id, True)
+    discard_user_message(message)
+    
+    today = datetime.now(TIMEZONE).strftime("%d.%m.%Y")
+    lines = pozivnoy_report_lines(async_db.iter_today_pozivnoy(user_id), today, profile)
+    await answer_chunks(message, chunk_lines(lines), POZIVNOY_MENU)
+
+async def pozivnoy_report_lines(rows, today, profile):
+    """Bugungi pozivnoylar hisobotini qatorma-qator hosil qilish"""
+    employee_name, region = profile
+    yield f"📅 BUGUNGI QO'SHILGAN POZIVNOY RO'YXATI ({today})\n\n"
+    i = 0
+    async for row in rows:
+        if i == 0:
+            yield f"{region} ✅ Xodim: {employee_name} ✅\n\n"
+        i += 1
+        yield f"{i}. {row['pozivnoy_number']}\n"
+    if i == 0:
+        yield "Hech qanday pozivnoy qo'shilmagan."
 
 # 👤 XODIM bo'limi
-@dp.message(F.text == "👤 XODIM")
-async def employee_section(message: types.Message, state: FSMContext):
+@menu_button("👤 XODIM")
+async def employee_section(message: types.Message, state: FSMContext, profile: tuple):
     await state.clear()
     await delete_previous_messages(message.from_user.id)
     
-    await save_message_id(message.from_user.id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
     user_id = message.from_user.id
-    employee_name, region = db.get_user_settings(user_id)
-    
+    msg = await message.answer(employee_text(profile), reply_markup=EMPLOYEE_MENU)
+    await save_message_id(user_id, msg.message_id)
+
+def employee_text(profile):
+    employee_name, region = profile
     text = "👤 XODIM bo'limi\n\n"
     if employee_name:
         text += f"📝 Ism: {employee_name}\n"
@@ -451,100 +789,219 @@ async def employee_section(message: types.Message, state: FSMContext):
         text += f"🏙️ Viloyat: {region}\n"
     else:
         text += "🏙️ Viloyat: ❌ Tanlanmagan"
-    
-    msg = await message.answer(text, reply_markup=get_employee_menu())
-    await save_message_id(user_id, msg.message_id, True)
+    return text
 
-@dp.message(F.text == "✏️ Xodim ismi")
-async def start_employee_name_input(message: types.Message, state: FSMContext):
+@menu_button("✏️ Xodim ismi")
+async def start_employee_name_input(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     await delete_previous_messages(user_id)
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
     msg = await message.answer(
         "✏️ Xodim ismingizni yozing:",
-        reply_markup=ReplyKeyboardMarkup(
-            keyboard=[[KeyboardButton(text="🔙 Asosiy menyu")]],
-            resize_keyboard=True
-        )
+        reply_markup=BACK_MENU
     )
     await state.set_state(EmployeeState.waiting_for_name)
-    await save_message_id(user_id, msg.message_id, True)
+    await save_message_id(user_id, msg.message_id)
 
 @dp.message(EmployeeState.waiting_for_name)
 async def process_employee_name(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
     employee_name = message.text.strip()
     username = message.from_user.username
     full_name = message.from_user.full_name
     
     # Bazaga saqlash
-    db.save_user_settings(user_id, username, full_name, employee_name=employee_name)
+    if await async_db.save_user_settings(user_id, username, full_name, employee_name=employee_name):
+        profile_cache.invalidate(user_id)
     
-    msg = await message.answer(
-        f"✅ Xodim ismi saqlandi: {employee_name}",
-        reply_markup=get_employee_menu()
-    )
+    await respond(message, state, f"✅ Xodim ismi saqlandi: {employee_name}", EMPLOYEE_MENU, EMPLOYEE_INLINE)
     
     await state.clear()
-    await save_message_id(user_id, msg.message_id, True)
 
-@dp.message(F.text == "🏙️ Viloyatlar")
-async def show_regions(message: types.Message, state: FSMContext):
+@menu_button("🏙️ Viloyatlar")
+async def show_regions(message: types.Message, state: FSMContext, profile: tuple):
     user_id = message.from_user.id
     await delete_previous_messages(user_id)
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
-    msg = await message.answer("Viloyatingizni tanlang:", reply_markup=get_regions_keyboard())
-    await save_message_id(user_id, msg.message_id, True)
+    msg = await message.answer("Viloyatingizni tanlang:", reply_markup=REGIONS_KEYBOARD)
+    await save_message_id(user_id, msg.message_id)
 
 # Viloyat tanlash handleri
-@dp.message(F.text.in_(REGIONS))
+@dp.message(F.text.in_(frozenset(REGIONS)))
 async def process_region(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
     
-    await save_message_id(user_id, message.message_id)
-    try:
-        await message.delete()
-    except:
-        pass
+    discard_user_message(message)
     
     region = message.text
     username = message.from_user.username
     full_name = message.from_user.full_name
     
     # Bazaga saqlash
-    db.save_user_settings(user_id, username, full_name, region=region)
+    if await async_db.save_user_settings(user_id, username, full_name, region=region):
+        profile_cache.invalidate(user_id)
     
     msg = await message.answer(
         f"✅ Viloyat saqlandi: {region}",
-        reply_markup=get_employee_menu()
+        reply_markup=EMPLOYEE_MENU
     )
     
     await state.clear()
-    await save_message_id(user_id, msg.message_id, True)
+    await save_message_id(user_id, msg.message_id)
+
+# Inline interfeys: tugma bosilganda yangi xabar o'rniga panel tahrirlanadi
+CALLBACK_HANDLERS = {}
+
+def callback_button(data):
+    """Handlerni inline tugma callback_data'siga bog'lash"""
+    def register(handler):
+        CALLBACK_HANDLERS[data] = handler
+        return handler
+    return register
+
+async def show(callback: types.CallbackQuery, text, reply_markup):
+    """Tugma bosilgan panel xabarini yangi matn va tugmalar bilan tahrirlash"""
+    panel = callback.message
+    if not await edit_panel(panel.chat.id, panel.message_id, text, reply_markup):
+        msg = await bot.send_message(panel.chat.id, text, reply_markup=reply_markup)
+        await save_message_id(callback.from_user.id, msg.message_id)
+
+async def prompt(callback: types.CallbackQuery, state: FSMContext, new_state, text):
+    """Panelda matn kiritishni so'rash; javob shu panelni tahrirlaydi"""
+    await show(callback, text, BACK_INLINE)
+    await state.set_state(new_state)
+    await state.set_data({"panel": callback.message.message_id})
+
+@dp.callback_query(lambda callback: callback.data in CALLBACK_HANDLERS)
+async def dispatch_callback(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await CALLBACK_HANDLERS[callback.data](callback, state, profile)
+    await callback.answer()
+
+dispatch_callback.resolve = lambda callback: CALLBACK_HANDLERS.get(callback.data)
+
+@callback_button("menu:main")
+async def inline_main_menu(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await state.clear()
+    await show(callback, "🏠 Asosiy menyu", MAIN_INLINE)
+
+@callback_button("menu:numbers")
+async def inline_numbers_section(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await state.clear()
+    await show(callback, "🔢 Raqam + Izoh bo'limi", NUMBERS_INLINE)
+
+@callback_button("numbers:add")
+async def inline_number_input(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    if not all(profile):
+        await show(callback, PROFILE_REQUIRED, MAIN_INLINE)
+        return
+    await prompt(callback, state, NumberState.waiting_for_phone,
+                 "📞 Telefon raqamingizni yuboring:\n\nNamuna: +998901234567 yoki 901234567")
+
+@callback_button("numbers:bulk")
+async def inline_bulk_input(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    if not all(profile):
+        await show(callback, PROFILE_REQUIRED, MAIN_INLINE)
+        return
+    await prompt(callback, state, NumberState.waiting_for_bulk,
+                 "📋 Raqamlarni izohlari bilan bitta xabarda yuboring, har biri alohida qatorda:\n\n"
+                 "901234567 — izoh\n"
+                 "+998901112233 — izoh")
+
+@callback_button("numbers:today")
+async def inline_today_numbers(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    today = datetime.now(TIMEZONE).strftime("%d.%m.%Y")
+    lines = numbers_report_lines(async_db.iter_today_numbers(callback.from_user.id), today, profile)
+    await show_chunks(callback, chunk_lines(lines), NUMBERS_INLINE)
+
+@callback_button("menu:pozivnoy")
+async def inline_pozivnoy_section(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await state.clear()
+    await show(callback, "🚖 Pozivnoylar bo'limi", POZIVNOY_INLINE)
+
+@callback_button("pozivnoy:add")
+async def inline_pozivnoy_input(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    if not all(profile):
+        await show(callback, PROFILE_REQUIRED, MAIN_INLINE)
+        return
+    await prompt(callback, state, PozivnoyState.waiting_for_pozivnoy,
+                 "🚖 Pozivnoy raqamini yuboring:\n\nNamuna: +998901234567 yoki 901234567")
+
+@callback_button("pozivnoy:today")
+async def inline_today_pozivnoy(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    today = datetime.now(TIMEZONE).strftime("%d.%m.%Y")
+    lines = pozivnoy_report_lines(async_db.iter_today_pozivnoy(callback.from_user.id), today, profile)
+    await show_chunks(callback, chunk_lines(lines), POZIVNOY_INLINE)
+
+@callback_button("menu:employee")
+async def inline_employee_section(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await state.clear()
+    await show(callback, employee_text(profile), EMPLOYEE_INLINE)
+
+@callback_button("employee:name")
+async def inline_employee_name_input(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await prompt(callback, state, EmployeeState.waiting_for_name, "✏️ Xodim ismingizni yozing:")
+
+@callback_button("employee:regions")
+async def inline_regions(callback: types.CallbackQuery, state: FSMContext, profile: tuple):
+    await show(callback, "Viloyatingizni tanlang:", REGIONS_INLINE)
+
+@dp.callback_query(F.data.in_(frozenset(f"region:{region}" for region in REGIONS)))
+async def inline_region(callback: types.CallbackQuery, state: FSMContext):
+    user_id = callback.from_user.id
+    region = callback.data.partition(":")[2]
+    
+    if await async_db.save_user_settings(user_id, callback.from_user.username, callback.from_user.full_name,
+                                         region=region):
+        profile_cache.invalidate(user_id)
+    
+    await state.clear()
+    await show(callback, f"✅ Viloyat saqlandi: {region}", EMPLOYEE_INLINE)
+    await callback.answer()
 
 # Asosiy funksiya
+background_tasks = []
+metrics_runner = None
+
+async def on_startup():
+    global metrics_runner
+    await duplicates.warm()
+    if METRICS_ENABLED:
+        metrics_runner = await start_metrics_server()
+        if METRICS_LOG_INTERVAL > 0:
+            background_tasks.append(asyncio.create_task(log_metrics_periodically()))
+    if MESSAGE_TRACKER_PERSIST:
+        rows = await async_db.load_tracked_messages(time.time() - MESSAGE_DELETE_MAX_AGE)
+        tracker.load([(chat_id, data) for chat_id, data in rows if owns_user(chat_id)])
+        background_tasks.append(asyncio.create_task(persist_tracker_periodically()))
+    # Ko'p jarayonli rejimda arxivlashni faqat birinchi worker bajaradi
+    if ARCHIVE_AFTER_DAYS > 0 and WORKER_INDEX <= 0:
+        background_tasks.append(asyncio.create_task(archive_periodically()))
+
+async def on_shutdown():
+    for task in background_tasks:
+        task.cancel()
+    if MESSAGE_TRACKER_PERSIST:
+        await persist_tracker()
+    await cleaner.close()
+    await async_db.close()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+
 async def main():
     logger.info("Bot ishga tushdi...")
-    await dp.start_polling(bot)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    if BOT_MODE == "webhook":
+        await run_webhook(dp, bot)
+    else:
+        await dp.start_polling(bot)
 
 if __name__ == "__main__":
     asyncio.run(main())
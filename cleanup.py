@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import time
+
+from aiogram.exceptions import TelegramAPIError
+
+from config import MESSAGE_DELETE_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+# deleteMessages bitta so'rovda qabul qiladigan maksimal xabarlar soni
+DELETE_BATCH_SIZE = 100
+
+class MessageCleaner:
+    """Xabarlarni javob yo'lidan tashqarida, fonda o'chiruvchi worker.
+
+    Har bir chat uchun yig'ilgan xabar id'lari birlashtirilib, Bot API'ning
+    `deleteMessages` metodi orqali 100 tadan o'chiriladi. Telegram baribir
+    o'chirishga ruxsat bermaydigan (48 soatdan eski) xabarlar tashlab yuboriladi.
+    """
+
+    def __init__(self, bot, max_age=MESSAGE_DELETE_MAX_AGE):
+        self.bot = bot
+        self.max_age = max_age
+        self.pending = {}
+        self.task = None
+        self.closing = False
+        self.wakeup = asyncio.Event()
+
+    def schedule(self, chat_id, message_id, sent_at=None):
+        """Xabarni o'chirish navbatiga qo'yish (kutmasdan qaytadi)"""
+        self.pending.setdefault(chat_id, []).append((message_id, sent_at or time.time()))
+        if self.task is None and not self.closing:
+            self.task = asyncio.create_task(self._worker())
+        self.wakeup.set()
+
+    async def _worker(self):
+        while True:
+            if not self.pending:
+                if self.closing:
+                    return
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            pending, self.pending = self.pending, {}
+            await asyncio.gather(*(self._delete_chat(chat_id, items) for chat_id, items in pending.items()))
+
+    async def _delete_chat(self, chat_id, items):
+        deadline = time.time() - self.max_age
+        message_ids = sorted({message_id for message_id, sent_at in items if sent_at > deadline})
+        for i in range(0, len(message_ids), DELETE_BATCH_SIZE):
+            batch = message_ids[i:i + DELETE_BATCH_SIZE]
+            try:
+                await self.bot.delete_messages(chat_id, batch)
+            except TelegramAPIError as e:
+                logger.debug(f"Xabarlarni o'chirishda xato ({chat_id}): {e}")
+            except Exception as e:
+                logger.error(f"Xabarlarni o'chirishda kutilmagan xato ({chat_id}): {e}")
+
+    async def close(self):
+        """Navbatdagi xabarlarni o'chirib, workerni to'xtatish"""
+        self.closing = True
+        if self.task is not None:
+            self.wakeup.set()
+            await self.task
+            self.task = None
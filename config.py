@@ -1,10 +1,99 @@
 import os
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
 load_dotenv()
 
 BOT_TOKEN = os.getenv('BOT_TOKEN', "8502586197:AAE68DBK67jTvkiRPTCXjNlZftS6BlVTewE")
 
+# Update olish usuli: "polling" yoki "webhook"
+BOT_MODE = os.getenv('BOT_MODE', "polling")
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL', "")
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', "/webhook")
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', "")
+WEBAPP_HOST = os.getenv('WEBAPP_HOST', "0.0.0.0")
+WEBAPP_PORT = int(os.getenv('WEBAPP_PORT', 8080))
+
+DB_PATH = os.getenv('DB_PATH', "/tmp/bot_database.db")
+DB_READERS = int(os.getenv('DB_READERS', 4))
+
+# Bot API HTTP sessiyasi: server manzili (bo'sh - api.telegram.org), ulanishlar
+# puli, keep-alive va DNS kesh muddati (soniya)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', "")
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 100))
+API_KEEPALIVE = float(os.getenv('API_KEEPALIVE', 60))
+API_DNS_TTL = int(os.getenv('API_DNS_TTL', 600))
+
+# So'rov vaqtlari: umumiy, o'chirish/tahrirlash uchun qisqa va fayl yuborish
+# uchun uzun; tarmoq va 5xx xatolarida qayta urinishlar va backoff (soniya)
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 10))
+API_FAST_TIMEOUT = float(os.getenv('API_FAST_TIMEOUT', 5))
+API_UPLOAD_TIMEOUT = float(os.getenv('API_UPLOAD_TIMEOUT', 60))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', 3))
+API_RETRY_BASE = float(os.getenv('API_RETRY_BASE', 0.5))
+API_RETRY_CAP = float(os.getenv('API_RETRY_CAP', 5))
+
+# Yozuvlar navbati: guruhdagi maksimal qatorlar soni va kutish vaqti (soniya)
+WRITE_BATCH_SIZE = int(os.getenv('WRITE_BATCH_SIZE', 200))
+WRITE_BATCH_DELAY = float(os.getenv('WRITE_BATCH_DELAY', 0.005))
+
+# Xodim profillari keshi: maksimal yozuvlar soni va yashash vaqti (soniya)
+PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 10000))
+PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', 300))
+
+# Bot API bundan eski xabarlarni o'chirishga ruxsat bermaydi (soniya)
+MESSAGE_DELETE_MAX_AGE = int(os.getenv('MESSAGE_DELETE_MAX_AGE', 48 * 3600))
+
+# Bot xabarlari kuzatuvchisi: chat boshiga maksimal xabarlar, chatlar soni
+# va holatni SQLite'da saqlash (qayta ishga tushganda tozalash davom etadi)
+MESSAGE_TRACKER_PER_CHAT = int(os.getenv('MESSAGE_TRACKER_PER_CHAT', 50))
+MESSAGE_TRACKER_MAX_CHATS = int(os.getenv('MESSAGE_TRACKER_MAX_CHATS', 200000))
+MESSAGE_TRACKER_PERSIST = os.getenv('MESSAGE_TRACKER_PERSIST', '1') == '1'
+MESSAGE_TRACKER_FLUSH_INTERVAL = float(os.getenv('MESSAGE_TRACKER_FLUSH_INTERVAL', 30))
+
+# Bot API limitlari: umumiy va chat boshiga so'rov/soniya, chatdagi burst
+# hamda 429 (retry_after) dan keyin qayta urinishlar soni
+RATE_LIMIT_GLOBAL = float(os.getenv('RATE_LIMIT_GLOBAL', 30))
+RATE_LIMIT_PER_CHAT = float(os.getenv('RATE_LIMIT_PER_CHAT', 1))
+RATE_LIMIT_CHAT_BURST = float(os.getenv('RATE_LIMIT_CHAT_BURST', 3))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', 3))
+
+# FSM holatlari: "sqlite" (qayta ishga tushishda saqlanadi) yoki "memory",
+# yozish oralig'i va eskirish muddati (soniya)
+FSM_STORAGE = os.getenv('FSM_STORAGE', "sqlite")
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', 1))
+FSM_TTL = float(os.getenv('FSM_TTL', 24 * 3600))
+
+# Arxivlash: shu kundan eski qatorlar oylik arxiv fayllariga ko'chiriladi
+# (0 - o'chirilgan), bir tranzaksiyadagi qatorlar soni va ishga tushish oralig'i
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', os.path.join(os.path.dirname(DB_PATH), "archive"))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 1000))
+ARCHIVE_INTERVAL = float(os.getenv('ARCHIVE_INTERVAL', 3600))
+
+# Metrikalar: yoqish, Prometheus eksporti uchun lokal HTTP manzil
+# (port band bo'lsa eksportsiz davom etiladi) va davriy log qatorlari
+# oralig'i (soniya, 0 - o'chirilgan). 9100 node_exporter'ga tegishli
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_HOST = os.getenv('METRICS_HOST', "127.0.0.1")
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9821))
+METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', 0))
+
+# Interfeys: "reply" (pastki klaviatura) yoki "inline" (bitta xabar
+# tahrirlanadigan inline tugmalar); /start shu rejimdagi menyuni ko'rsatadi
+UI_MODE = os.getenv('UI_MODE', "reply")
+
+# Ko'p jarayonli rejim (`python workers.py`): worker jarayonlar soni;
+# WORKER_INDEX har bir workerga front jarayon tomonidan beriladi
+WORKERS = int(os.getenv('WORKERS', 1))
+WORKER_INDEX = int(os.getenv('WORKER_INDEX', -1))
+
+# Ish kuni shu vaqt zonasi bo'yicha hisoblanadi
+TIMEZONE = ZoneInfo(os.getenv('TIMEZONE', "Asia/Tashkent"))
+
+# Statistika va eksport buyruqlaridan foydalana oladigan Telegram ID'lar
+ADMIN_IDS = frozenset(int(x) for x in os.getenv('ADMIN_IDS', "").replace(" ", "").split(",") if x)
+
 REGIONS = [
     "Andijon", "Buxoro", "Farg'ona", "Jizzax", 
     "Qashqadaryo", "Navoiy", "Namangan", "Samarqand",
@@ -1,120 +1,791 @@
-import sqlite3
+import asyncio
+import functools
+import json
+import logging
 import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from config import ARCHIVE_DIR, DB_PATH, DB_READERS, TIMEZONE, WRITE_BATCH_SIZE, WRITE_BATCH_DELAY
+from metrics import timed_query
+
+logger = logging.getLogger(__name__)
+
+# save_user_settings'da "bu maydon berilmagan" belgisi (None'dan farqli)
+UNSET = object()
+
+INSERT_NUMBER = '''
+    INSERT INTO numbers (user_id, phone, comment, region, employee_name, day)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_POZIVNOY = '''
+    INSERT INTO pozivnoy (user_id, pozivnoy_number, region, employee_name, day)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Eksport qilinadigan ustunlar
+EXPORT_COLUMNS = {
+    "numbers": ("created_date", "day", "region", "employee_name", "phone", "comment"),
+    "pozivnoy": ("created_date", "day", "region", "employee_name", "pozivnoy_number"),
+}
+
+# Arxiv fayllaridagi jadvallar sxemasi (asosiy jadvaldan ko'chiriladigan ustunlar)
+ARCHIVE_TABLES = {
+    "numbers": '''
+        id INTEGER PRIMARY KEY, user_id INTEGER, phone TEXT NOT NULL, comment TEXT,
+        region TEXT, employee_name TEXT, created_date TIMESTAMP, day TEXT
+    ''',
+    "pozivnoy": '''
+        id INTEGER PRIMARY KEY, user_id INTEGER, pozivnoy_number TEXT NOT NULL,
+        region TEXT, employee_name TEXT, created_date TIMESTAMP, day TEXT
+    ''',
+}
+ARCHIVE_COLUMNS = {
+    "numbers": "id, user_id, phone, comment, region, employee_name, created_date, day",
+    "pozivnoy": "id, user_id, pozivnoy_number, region, employee_name, created_date, day",
+}
+
+def _next_month(month):
+    """'YYYY-MM' dan keyingi oyning birinchi kuni (YYYY-MM-DD)"""
+    year, number = map(int, month.split("-"))
+    year, number = (year + 1, 1) if number == 12 else (year, number + 1)
+    return f"{year:04d}-{number:02d}-01"
+
+# Qidiruv turlari: (FROM qismi, shart, tartiblash kaliti). Raqam qidiruvlari
+# indeks tartibida (raqam, id) qaytariladi: saralash uchun vaqtinchalik B-tree kerak emas
+SEARCH_QUERIES = {
+    "text": ("numbers_fts f JOIN numbers n ON n.id = f.rowid", "numbers_fts MATCH ?", ("f.rowid",)),
+    "prefix": ("numbers n", "n.phone >= ? AND n.phone < ? || '~'", ("n.phone", "n.id")),
+    "suffix": ("numbers n", "n.phone_suffix >= ? AND n.phone_suffix < ? || '~'", ("n.phone_suffix", "n.id")),
+}
+
+# Ro'yxatlarni o'qishda bitta sahifadagi qatorlar soni
+DB_PAGE_SIZE = 500
+
+# Har bir ulanish uchun sozlamalar
+PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+def search_cursor(mode, row):
+    """`search_numbers` natijasidagi qatordan keyingi sahifa kaliti"""
+    return [row['sort_key']] if mode == "text" else [row['sort_key'], row['id']]
+
+def work_day(moment=None):
+    """Mahalliy ish kuni (YYYY-MM-DD)"""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(TIMEZONE).date().isoformat()
+
+def _utc_to_work_day(created_date):
+    """CURRENT_TIMESTAMP (UTC) qiymatidan mahalliy ish kunini hisoblash"""
+    if created_date is None:
+        return None
+    moment = datetime.fromisoformat(created_date).replace(tzinfo=timezone.utc)
+    return work_day(moment)
+
+def _migration_work_day(conn):
+    """numbers/pozivnoy jadvallariga mahalliy `day` ustuni va indekslar"""
+    conn.create_function("utc_to_work_day", 1, _utc_to_work_day, deterministic=True)
+    for table in ("numbers", "pozivnoy"):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN day TEXT")
+        conn.execute(f"UPDATE {table} SET day = utc_to_work_day(created_date)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_day ON {table} (user_id, day, created_date)")
+
+def _migration_tracked_messages(conn):
+    """Kuzatilayotgan bot xabarlari (MessageTracker) uchun jadval"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tracked_messages (
+            chat_id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+
+def _migration_fsm_storage(conn):
+    """SQLiteStorage uchun FSM holatlari jadvali"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated ON fsm_storage (updated_at)")
+
+def _migration_day_phone_index(conn):
+    """Kunlik takroriy raqamlarni tekshirish uchun qamrovchi indeks"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_numbers_day_phone
+        ON numbers (day, phone, user_id, employee_name, region)
+    ''')
+
+def _migration_daily_stats(conn):
+    """Kun/viloyat/xodim kesimidagi hisoblagichlar, triggerlar bilan yangilanadi"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT NOT NULL,
+            region TEXT NOT NULL,
+            employee_name TEXT NOT NULL,
+            numbers_count INTEGER NOT NULL DEFAULT 0,
+            pozivnoy_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, region, employee_name)
+        ) WITHOUT ROWID
+    ''')
+    for table, counter in (("numbers", "numbers_count"), ("pozivnoy", "pozivnoy_count")):
+        # Mavjud qatorlarni bir marta hisoblab chiqish
+        conn.execute(f'''
+            INSERT INTO daily_stats (day, region, employee_name, {counter})
+            SELECT day, COALESCE(region, ''), COALESCE(employee_name, ''), COUNT(*)
+            FROM {table} WHERE day IS NOT NULL
+            GROUP BY day, COALESCE(region, ''), COALESCE(employee_name, '')
+            ON CONFLICT (day, region, employee_name) DO UPDATE SET {counter} = excluded.{counter}
+        ''')
+        # Har bir yangi qator shu tranzaksiyaning o'zida hisoblagichni oshiradi
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_daily_stats AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO daily_stats (day, region, employee_name, {counter})
+                VALUES (NEW.day, COALESCE(NEW.region, ''), COALESCE(NEW.employee_name, ''), 1)
+                ON CONFLICT (day, region, employee_name) DO UPDATE SET {counter} = {counter} + 1;
+            END
+        ''')
+
+def _migration_day_index(conn):
+    """Sana oralig'i bo'yicha o'qish (eksport, arxivlash) uchun indekslar"""
+    for table in ("numbers", "pozivnoy"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_day ON {table} (day, created_date)")
+
+# Raqamlarning teskari tartibi (faqat raqamlar, 15 tagacha): oxirgi raqamlar
+# bo'yicha qidiruv shu ustun indeksida prefiks qidiruviga aylanadi
+_PHONE_SUFFIX = "||".join(f"substr(replace(phone, '+', ''), -{i}, 1)" for i in range(1, 16))
+
+def _migration_search_index(conn):
+    """Qidiruv: izohlar uchun FTS5 indeksi, raqam boshi va oxiri bo'yicha indekslar.
+
+    FTS5 jadvali `numbers` ga tashqi kontent sifatida bog'langan va
+    triggerlar bilan sinxron saqlanadi (arxivlash qatorlarni o'chirganda ham).
+    """
+    conn.execute(f"ALTER TABLE numbers ADD COLUMN phone_suffix TEXT GENERATED ALWAYS AS ({_PHONE_SUFFIX}) VIRTUAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_numbers_phone ON numbers (phone)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_numbers_phone_suffix ON numbers (phone_suffix)")
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS numbers_fts USING fts5(
+            comment, content='numbers', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_numbers_fts_insert AFTER INSERT ON numbers BEGIN
+            INSERT INTO numbers_fts (rowid, comment) VALUES (new.id, new.comment);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_numbers_fts_delete AFTER DELETE ON numbers BEGIN
+            INSERT INTO numbers_fts (numbers_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_numbers_fts_update AFTER UPDATE OF comment ON numbers BEGIN
+            INSERT INTO numbers_fts (numbers_fts, rowid, comment) VALUES ('delete', old.id, old.comment);
+            INSERT INTO numbers_fts (rowid, comment) VALUES (new.id, new.comment);
+        END
+    ''')
+    conn.execute("INSERT INTO numbers_fts (numbers_fts) VALUES ('rebuild')")
+
+# Sxema migratsiyalari; tartib raqami PRAGMA user_version'da saqlanadi
+MIGRATIONS = [
+    _migration_work_day,
+    _migration_tracked_messages,
+    _migration_fsm_storage,
+    _migration_day_phone_index,
+    _migration_daily_stats,
+    _migration_day_index,
+    _migration_search_index,
+]
 
 class Database:
-    def __init__(self):
-        self.db_path = "/tmp/bot_database.db"
+    def __init__(self, db_path=DB_PATH, readers=DB_READERS, archive_dir=ARCHIVE_DIR):
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        # Bitta yozuvchi ulanish (lock bilan) va o'quvchilar puli
+        self.write_lock = threading.RLock()
+        self.writer = self.connect()
+        self.enable_incremental_vacuum()
+        self.writer.execute("PRAGMA journal_mode = WAL")
         self.init_db()
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            self.readers.put(self.connect())
     
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
+    def connect(self):
+        # uri=True: arxivlarni ATTACH 'file:...?mode=ro' bilan faqat o'qish uchun ulash mumkin
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256, uri=True)
         conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
         return conn
     
+    @contextmanager
+    def writing(self):
+        """Yozuvchi ulanishda tranzaksiya: muvaffaqiyatda commit, xatoda rollback"""
+        with self.write_lock:
+            try:
+                yield self.writer
+                self.writer.commit()
+            except Exception:
+                self.writer.rollback()
+                raise
+    
+    @contextmanager
+    def reading(self):
+        """Puldan o'quvchi ulanishni olish va qaytarish"""
+        conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put(conn)
+    
+    def enable_incremental_vacuum(self):
+        """auto_vacuum=INCREMENTAL; mavjud bazada bir martalik VACUUM talab qilinadi"""
+        if self.writer.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self.writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.writer.execute("VACUUM")
+    
+    def close(self):
+        with self.write_lock:
+            self.writer.close()
+        while not self.readers.empty():
+            self.readers.get_nowait().close()
+    
     def init_db(self):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS user_settings (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                full_name TEXT,
-                employee_name TEXT,
-                region TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS numbers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                phone TEXT NOT NULL,
-                comment TEXT,
-                region TEXT,
-                employee_name TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        with self.writing() as conn:
+            cur = conn.cursor()
+            
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS user_settings (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    full_name TEXT,
+                    employee_name TEXT,
+                    region TEXT,
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS numbers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    phone TEXT NOT NULL,
+                    comment TEXT,
+                    region TEXT,
+                    employee_name TEXT,
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS pozivnoy (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    pozivnoy_number TEXT NOT NULL,
+                    region TEXT,
+                    employee_name TEXT,
+                    created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
         
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS pozivnoy (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                pozivnoy_number TEXT NOT NULL,
-                region TEXT,
-                employee_name TEXT,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
-    def save_user_settings(self, user_id, username, full_name, employee_name=None, region=None):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT OR REPLACE INTO user_settings 
-            (user_id, username, full_name, employee_name, region)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, username, full_name, employee_name, region))
-        conn.commit()
-        conn.close()
+        self.migrate()
+    
+    def migrate(self):
+        """Qo'llanmagan migratsiyalarni ketma-ket bajarish"""
+        version = self.writer.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+            with self.writing() as conn:
+                conn.execute("BEGIN")
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
     
+    @timed_query
+    def save_user_settings(self, user_id, username=UNSET, full_name=UNSET, employee_name=UNSET, region=UNSET):
+        """Faqat berilgan maydonlarni bitta UPSERT bilan yangilash.
+
+        Berilmagan (UNSET) maydonlar o'zgarmaydi. Yangi qator qo'shilsa yoki
+        biror maydon haqiqatan o'zgarsa True, aks holda False qaytaradi.
+        """
+        fields = {
+            'username': username,
+            'full_name': full_name,
+            'employee_name': employee_name,
+            'region': region,
+        }
+        fields = {name: value for name, value in fields.items() if value is not UNSET}
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        if fields:
+            updates = ", ".join(f"{name} = excluded.{name}" for name in fields)
+            changed = " OR ".join(f"{name} IS NOT excluded.{name}" for name in fields)
+            conflict = f"DO UPDATE SET {updates} WHERE {changed}"
+        else:
+            conflict = "DO NOTHING"
+        with self.writing() as conn:
+            cur = conn.execute(f'''
+                INSERT INTO user_settings (user_id{", " if fields else ""}{columns})
+                VALUES (?{", " if fields else ""}{placeholders})
+                ON CONFLICT(user_id) {conflict}
+            ''', (user_id, *fields.values()))
+            return cur.rowcount > 0
+    
+    @timed_query
     def get_user_settings(self, user_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('SELECT employee_name, region FROM user_settings WHERE user_id = ?', (user_id,))
-        result = cur.fetchone()
-        conn.close()
+        with self.reading() as conn:
+            result = conn.execute(
+                'SELECT employee_name, region FROM user_settings WHERE user_id = ?', (user_id,)
+            ).fetchone()
         if result:
             return (result['employee_name'], result['region'])
         return (None, None)
     
+    @timed_query
     def save_number(self, user_id, phone, comment, region, employee_name):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO numbers (user_id, phone, comment, region, employee_name)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, phone, comment, region, employee_name))
-        conn.commit()
-        conn.close()
+        with self.writing() as conn:
+            conn.execute(INSERT_NUMBER, (user_id, phone, comment, region, employee_name, work_day()))
     
+    @timed_query
     def save_pozivnoy(self, user_id, pozivnoy_number, region, employee_name):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO pozivnoy (user_id, pozivnoy_number, region, employee_name)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, pozivnoy_number, region, employee_name))
-        conn.commit()
-        conn.close()
-    
-    def get_today_numbers(self, user_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT phone, comment, region FROM numbers 
-            WHERE user_id = ? AND DATE(created_date) = DATE('now')
-            ORDER BY created_date
-        ''', (user_id,))
-        results = cur.fetchall()
-        conn.close()
-        return [(row['phone'], row['comment'], row['region']) for row in results]
-    
-    def get_today_pozivnoy(self, user_id):
-        conn = self.get_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT pozivnoy_number, region FROM pozivnoy 
-            WHERE user_id = ? AND DATE(created_date) = DATE('now')
-            ORDER BY created_date
-        ''', (user_id,))
-        results = cur.fetchall()
-        conn.close()
-        return [(row['pozivnoy_number'], row['region']) for row in results]
+        with self.writing() as conn:
+            conn.execute(INSERT_POZIVNOY, (user_id, pozivnoy_number, region, employee_name, work_day()))
+    
+    @timed_query
+    def save_batch(self, numbers=(), pozivnoy=()):
+        """Ko'p qatorni bitta tranzaksiyada (bitta commit bilan) yozish.
+
+        Qatorlar INSERT_NUMBER / INSERT_POZIVNOY parametrlari tartibida,
+        `day` ustuni bilan birga beriladi. Yozilgan qatorlar sonini qaytaradi.
+        """
+        with self.writing() as conn:
+            if numbers:
+                conn.executemany(INSERT_NUMBER, numbers)
+            if pozivnoy:
+                conn.executemany(INSERT_POZIVNOY, pozivnoy)
+        return len(numbers) + len(pozivnoy)
+    
+    @timed_query
+    def get_numbers_page(self, user_id, day, after=("", 0), limit=500):
+        """Kunlik raqamlarning keyingi sahifasi (keyset: created_date, id)"""
+        with self.reading() as conn:
+            return conn.execute('''
+                SELECT id, created_date, phone, comment, region FROM numbers
+                WHERE user_id = ? AND day = ? AND (created_date, id) > (?, ?)
+                ORDER BY created_date, id
+                LIMIT ?
+            ''', (user_id, day, *after, limit)).fetchall()
+    
+    @timed_query
+    def get_pozivnoy_page(self, user_id, day, after=("", 0), limit=500):
+        """Kunlik pozivnoylarning keyingi sahifasi (keyset: created_date, id)"""
+        with self.reading() as conn:
+            return conn.execute('''
+                SELECT id, created_date, pozivnoy_number, region FROM pozivnoy
+                WHERE user_id = ? AND day = ? AND (created_date, id) > (?, ?)
+                ORDER BY created_date, id
+                LIMIT ?
+            ''', (user_id, day, *after, limit)).fetchall()
+    
+    @timed_query
+    def get_day_phones(self, day):
+        """Kun davomida kiritilgan raqamlar egalari: (phone, user_id, employee_name, region)"""
+        with self.reading() as conn:
+            results = conn.execute('''
+                SELECT DISTINCT phone, user_id, employee_name, region FROM numbers
+                WHERE day = ?
+            ''', (day,)).fetchall()
+        return [(row['phone'], row['user_id'], row['employee_name'], row['region']) for row in results]
+    
+    @timed_query
+    def get_phone_owners(self, day, phone):
+        """Raqamni shu kuni kiritganlar: (user_id, employee_name, region)"""
+        with self.reading() as conn:
+            results = conn.execute('''
+                SELECT DISTINCT user_id, employee_name, region FROM numbers
+                WHERE day = ? AND phone = ?
+            ''', (day, phone)).fetchall()
+        return [(row['user_id'], row['employee_name'], row['region']) for row in results]
+    
+    @timed_query
+    def search_numbers(self, mode, term, region=None, employee_name=None, after=None, limit=10):
+        """Raqamlarni qidirish; sahifalash `after` (oldingi sahifa oxirgi qatorining
+        `search_cursor` kaliti) bilan.
+
+        `mode` va `term` search.parse_search_term natijasi: izohlar bo'yicha
+        FTS5 so'rovi (eng yangilari birinchi) yoki raqamning boshi/oxiri
+        (teskari) bo'yicha prefiks (raqam tartibida, kamayish bo'yicha).
+        """
+        source, condition, order = SEARCH_QUERIES[mode]
+        conditions = [condition]
+        params = [term] if mode == "text" else [term, term]
+        if region:
+            conditions.append("n.region = ?")
+            params.append(region)
+        if employee_name:
+            conditions.append("n.employee_name = ?")
+            params.append(employee_name)
+        if after is not None:
+            conditions.append(f"({', '.join(order)}) < ({', '.join('?' * len(order))})")
+            params.extend(after)
+        with self.reading() as conn:
+            return conn.execute(f'''
+                SELECT n.id, n.day, n.phone, n.comment, n.region, n.employee_name,
+                       {order[0]} AS sort_key FROM {source}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {", ".join(f"{column} DESC" for column in order)}
+                LIMIT ?
+            ''', (*params, limit)).fetchall()
+    
+    def iter_export_rows(self, table, day_from, day_to, region=None, employee_name=None):
+        """Sana oralig'idagi qatorlarni kursordan bo'lib-bo'lib o'qiydigan generator.
+
+        Iteratsiya davomida o'quvchi ulanish band turadi, shuning uchun uni
+        worker oqimida oxirigacha o'qish kerak.
+        """
+        conditions = ["day BETWEEN ? AND ?"]
+        params = [day_from, day_to]
+        if region:
+            conditions.append("region = ?")
+            params.append(region)
+        if employee_name:
+            conditions.append("employee_name = ?")
+            params.append(employee_name)
+        query = f'''
+            SELECT {", ".join(EXPORT_COLUMNS[table])} FROM {{source}}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY day, created_date
+        '''
+        with self.reading() as conn:
+            # Avval arxivdagi (eskiroq) oylar, keyin asosiy baza
+            for path in self.archive_paths(day_from, day_to):
+                conn.execute("ATTACH DATABASE ? AS archive", (f"file:{path}?mode=ro",))
+                try:
+                    # Eski fayllarda faqat arxivlangan jadval bo'lishi mumkin
+                    if conn.execute("SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = ?",
+                                    (table,)).fetchone():
+                        yield from self._fetch_pages(conn, query.format(source=f"archive.{table}"), params)
+                finally:
+                    conn.execute("DETACH DATABASE archive")
+            yield from self._fetch_pages(conn, query.format(source=f"main.{table}"), params)
+    
+    @staticmethod
+    def _fetch_pages(conn, query, params):
+        cur = conn.execute(query, params)
+        while True:
+            rows = cur.fetchmany(DB_PAGE_SIZE)
+            if not rows:
+                return
+            yield from rows
+    
+    def archive_path(self, month):
+        return os.path.join(self.archive_dir, f"archive_{month}.db")
+    
+    def archive_paths(self, day_from, day_to):
+        """Sana oralig'iga to'g'ri keladigan mavjud oylik arxiv fayllari"""
+        paths = []
+        month = day_from[:7]
+        while month <= day_to[:7]:
+            path = self.archive_path(month)
+            if os.path.exists(path):
+                paths.append(path)
+            month = _next_month(month)[:7]
+        return paths
+    
+    @timed_query
+    def archive_batch(self, table, cutoff_day, batch_size):
+        """`cutoff_day` dan eski eng qadimgi qatorlardan `batch_size` tasini oylik arxivga ko'chirish.
+
+        Ikki qisqa tranzaksiya: avval qatorlar arxivga yozilib commit qilinadi,
+        keyin asosiy bazadan o'chiriladi. WAL rejimida ATTACH qilingan fayllar
+        orasidagi tranzaksiya atomar emas, shuning uchun tartib muhim: uzilish
+        faqat arxivda nusxa qoldirishi mumkin, qayta ishga tushganda esa
+        INSERT OR IGNORE uni takrorlamaydi. Ko'chirilgan qatorlar sonini qaytaradi.
+        """
+        with self.reading() as conn:
+            oldest = conn.execute(f"SELECT MIN(day) FROM {table} WHERE day < ?", (cutoff_day,)).fetchone()[0]
+        if oldest is None:
+            return 0
+        month = oldest[:7]
+        os.makedirs(self.archive_dir, exist_ok=True)
+        columns = ARCHIVE_COLUMNS[table]
+        with self.write_lock:
+            self.writer.execute("ATTACH DATABASE ? AS archive", (self.archive_path(month),))
+            try:
+                with self.writing() as conn:
+                    # Oylik faylda ikkala jadval ham bo'ladi: eksport har doim ikkalasini o'qiydi
+                    for name, schema in ARCHIVE_TABLES.items():
+                        conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{name} ({schema})")
+                        conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{name}_day ON {name} (day, created_date)")
+                    ids = [row[0] for row in conn.execute(f'''
+                        SELECT id FROM main.{table}
+                        WHERE day >= ? AND day < ?
+                        ORDER BY day, created_date
+                        LIMIT ?
+                    ''', (oldest, min(_next_month(month), cutoff_day), batch_size))]
+                    payload = json.dumps(ids)
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.{table} ({columns})
+                        SELECT {columns} FROM main.{table} WHERE id IN (SELECT value FROM json_each(?))
+                    ''', (payload,))
+                # Arxiv commit qilingandan keyingina asosiy bazadan o'chiriladi
+                if ids:
+                    with self.writing() as conn:
+                        conn.execute(f"DELETE FROM main.{table} WHERE id IN (SELECT value FROM json_each(?))",
+                                     (payload,))
+            finally:
+                self.writer.execute("DETACH DATABASE archive")
+        return len(ids)
+    
+    def reclaim_space(self, pages=1000):
+        """Bo'shagan sahifalarni bo'lib-bo'lib fayl tizimiga qaytarish (incremental vacuum)"""
+        with self.write_lock:
+            # execute() ustunsiz PRAGMA'ni bir qadamdan keyin to'xtatadi (bitta sahifa);
+            # executescript oxirigacha bajaradi
+            self.writer.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            return self.writer.execute("PRAGMA freelist_count").fetchone()[0]
+    
+    @timed_query
+    def get_daily_stats(self, day):
+        """Kunlik hisoblagichlar: (region, employee_name, numbers_count, pozivnoy_count)"""
+        with self.reading() as conn:
+            results = conn.execute('''
+                SELECT region, employee_name, numbers_count, pozivnoy_count FROM daily_stats
+                WHERE day = ?
+                ORDER BY region, employee_name
+            ''', (day,)).fetchall()
+        return [tuple(row) for row in results]
+    
+    @timed_query
+    def save_tracked_messages(self, rows, removed=()):
+        """MessageTracker holatini saqlash: (chat_id, data, updated_at) qatorlari"""
+        with self.writing() as conn:
+            conn.executemany('''
+                INSERT INTO tracked_messages (chat_id, data, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(chat_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            ''', rows)
+            conn.executemany('DELETE FROM tracked_messages WHERE chat_id = ?', [(chat_id,) for chat_id in removed])
+    
+    @timed_query
+    def load_tracked_messages(self, since):
+        """`since` dan keyin yangilangan MessageTracker yozuvlari; eskilari o'chiriladi"""
+        with self.writing() as conn:
+            conn.execute('DELETE FROM tracked_messages WHERE updated_at < ?', (since,))
+        with self.reading() as conn:
+            results = conn.execute('SELECT chat_id, data FROM tracked_messages ORDER BY updated_at').fetchall()
+        return [(row['chat_id'], row['data']) for row in results]
+
+    
+    @timed_query
+    def save_fsm_records(self, rows, removed=()):
+        """FSM holatlarini saqlash: (key, state, data, updated_at) qatorlari"""
+        with self.writing() as conn:
+            conn.executemany('''
+                INSERT INTO fsm_storage (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+            ''', rows)
+            conn.executemany('DELETE FROM fsm_storage WHERE key = ?', [(key,) for key in removed])
+    
+    @timed_query
+    def load_fsm_records(self, since):
+        """`since` dan keyin yangilangan FSM holatlari; muddati o'tganlari o'chiriladi"""
+        with self.writing() as conn:
+            conn.execute('DELETE FROM fsm_storage WHERE updated_at < ?', (since,))
+        with self.reading() as conn:
+            results = conn.execute('SELECT key, state, data FROM fsm_storage').fetchall()
+        return [(row['key'], row['state'], row['data']) for row in results]
+
+
+class WriteQueue:
+    """Kiritishlarni yig'ib, guruh bo'lib bitta tranzaksiyada yozuvchi navbat.
+
+    Handler qatorni navbatga qo'yadi va u diskka yozilib bo'lgach
+    (commit tugagach) javob oladi. Guruh `max_batch` qatorga yetganda
+    yoki birinchi qatordan keyin `max_delay` soniya o'tganda yoziladi.
+    """
+
+    def __init__(self, async_db, max_batch=WRITE_BATCH_SIZE, max_delay=WRITE_BATCH_DELAY):
+        self.async_db = async_db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.task = None
+        self.closing = False
+        self.wakeup = asyncio.Event()
+        self.full = asyncio.Event()
+
+    async def put(self, table, row):
+        """Qatorni navbatga qo'yish va u saqlanguncha kutish"""
+        if self.closing:
+            raise RuntimeError("Yozuvlar navbati yopilgan")
+        if self.task is None:
+            self.task = asyncio.create_task(self._worker())
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((table, row, future))
+        self.wakeup.set()
+        if len(self.pending) >= self.max_batch:
+            self.full.set()
+        await future
+
+    async def _worker(self):
+        while True:
+            if not self.pending:
+                if self.closing:
+                    return
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            if len(self.pending) < self.max_batch and not self.closing:
+                try:
+                    await asyncio.wait_for(self.full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self.pending[:self.max_batch]
+            self.pending = self.pending[self.max_batch:]
+            if len(self.pending) < self.max_batch:
+                self.full.clear()
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        numbers = [row for table, row, _ in batch if table == "numbers"]
+        pozivnoy = [row for table, row, _ in batch if table == "pozivnoy"]
+        try:
+            await self.async_db._run(self.async_db.db.save_batch, numbers, pozivnoy)
+        except Exception as e:
+            logger.error(f"Yozuvlar guruhini saqlashda xato: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def close(self):
+        """Navbatda qolgan barcha qatorlarni yozib, workerni to'xtatish"""
+        self.closing = True
+        if self.task is not None:
+            self.wakeup.set()
+            await self.task
+            self.task = None
+
+class AsyncDatabase:
+    """Database metodlarini alohida oqimda bajaruvchi asinxron qobiq.
+
+    SQLite chaqiruvlari (commit va fsync bilan birga) event loop'ni
+    to'xtatib qo'ymasligi uchun worker oqimlarida bajariladi: yozuvlar
+    bitta maxsus oqimda, o'qishlar esa o'quvchi ulanishlar soniga teng
+    oqimlar pulida (WAL rejimida ular yozuvchini kutmaydi).
+    """
+
+    def __init__(self, database, readers=DB_READERS):
+        self.db = database
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        self.read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self.write_queue = WriteQueue(self)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _read(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.read_executor, functools.partial(func, *args, **kwargs))
+
+    async def save_user_settings(self, user_id, username=UNSET, full_name=UNSET, employee_name=UNSET, region=UNSET):
+        return await self._run(self.db.save_user_settings, user_id, username, full_name,
+                               employee_name=employee_name, region=region)
+
+    async def get_user_settings(self, user_id):
+        return await self._read(self.db.get_user_settings, user_id)
+
+    async def save_number(self, user_id, phone, comment, region, employee_name):
+        await self.write_queue.put("numbers", (user_id, phone, comment, region, employee_name, work_day()))
+
+    async def save_pozivnoy(self, user_id, pozivnoy_number, region, employee_name):
+        await self.write_queue.put("pozivnoy", (user_id, pozivnoy_number, region, employee_name, work_day()))
+
+    async def save_numbers(self, user_id, entries, region, employee_name):
+        """Ko'p (telefon, izoh) juftini bitta executemany tranzaksiyasida saqlash"""
+        day = work_day()
+        rows = [(user_id, phone, comment, region, employee_name, day) for phone, comment in entries]
+        await self._run(self.db.save_batch, numbers=rows)
+
+    async def _iter_pages(self, fetch_page, user_id, page_size):
+        day = work_day()
+        after = ("", 0)
+        while True:
+            rows = await self._read(fetch_page, user_id, day, after, page_size)
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            after = (rows[-1]['created_date'], rows[-1]['id'])
+
+    def iter_today_numbers(self, user_id, page_size=DB_PAGE_SIZE):
+        """Bugungi raqamlarni sahifalab o'qiydigan asinxron generator (sqlite3.Row qatorlari)"""
+        return self._iter_pages(self.db.get_numbers_page, user_id, page_size)
+
+    def iter_today_pozivnoy(self, user_id, page_size=DB_PAGE_SIZE):
+        """Bugungi pozivnoylarni sahifalab o'qiydigan asinxron generator (sqlite3.Row qatorlari)"""
+        return self._iter_pages(self.db.get_pozivnoy_page, user_id, page_size)
+
+    async def get_day_phones(self, day):
+        return await self._read(self.db.get_day_phones, day)
+
+    async def get_phone_owners(self, day, phone):
+        return await self._read(self.db.get_phone_owners, day, phone)
+
+    async def search_numbers(self, mode, term, region=None, employee_name=None, after=None, limit=10):
+        return await self._read(self.db.search_numbers, mode, term, region, employee_name, after, limit)
+
+    async def archive_batch(self, table, cutoff_day, batch_size):
+        return await self._run(self.db.archive_batch, table, cutoff_day, batch_size)
+
+    async def reclaim_space(self, pages=1000):
+        return await self._run(self.db.reclaim_space, pages)
+
+    async def run_in_reader(self, func, *args, **kwargs):
+        """Uzoq davom etadigan o'qish ishini (masalan, eksport) o'quvchi oqimida bajarish"""
+        return await self._read(func, *args, **kwargs)
+
+    async def get_daily_stats(self, day):
+        return await self._read(self.db.get_daily_stats, day)
+
+    async def save_tracked_messages(self, rows, removed=()):
+        return await self._run(self.db.save_tracked_messages, rows, removed)
+
+    async def load_tracked_messages(self, since):
+        return await self._run(self.db.load_tracked_messages, since)
+
+    async def save_fsm_records(self, rows, removed=()):
+        return await self._run(self.db.save_fsm_records, rows, removed)
+
+    async def load_fsm_records(self, since):
+        return await self._run(self.db.load_fsm_records, since)
+
+    async def close(self):
+        """Navbatdagi yozuvlarni saqlab, oqimlar va ulanishlarni yopish"""
+        await self.write_queue.close()
+        self.executor.shutdown(wait=True)
+        self.read_executor.shutdown(wait=True)
+        self.db.close()
 
 db = Database()
+async_db = AsyncDatabase(db)
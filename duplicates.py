@@ -0,0 +1,54 @@
+from database import async_db, work_day
+from sharding import SHARDED
+
+class DuplicateIndex:
+    """Bugun kiritilgan raqamlarning xotiradagi indeksi (raqam -> egalari).
+
+    Kun boshida (yoki birinchi murojaatda) `idx_numbers_day_phone`
+    indeksidan bir marta yuklanadi, keyin saqlangan har bir raqam bilan
+    to'ldiriladi, shuning uchun tekshiruv bitta lug'at qidiruvidir.
+
+    Ko'p jarayonli rejimda (`shared`) boshqa workerlar saqlagan raqamlar
+    xotirada ko'rinmaydi, shuning uchun har bir tekshiruv bazadagi
+    indeksdan o'qiladi.
+    """
+
+    def __init__(self, shared=SHARDED):
+        self.shared = shared
+        self.day = None
+        self.owners = {}
+
+    async def _today(self):
+        day = work_day()
+        if day != self.day:
+            owners = {}
+            for phone, user_id, employee_name, region in await async_db.get_day_phones(day):
+                owners.setdefault(phone, {})[user_id] = (employee_name, region)
+            # Yuklash davomida kun almashgan bo'lishi mumkin
+            if work_day() == day:
+                self.day, self.owners = day, owners
+        return self.owners
+
+    async def warm(self):
+        if not self.shared:
+            await self._today()
+
+    async def others(self, phone, user_id):
+        """Bu raqamni bugun kiritgan boshqa xodimlar: [(employee_name, region)]"""
+        if self.shared:
+            return [(employee_name, region) for owner_id, employee_name, region
+                    in await async_db.get_phone_owners(work_day(), phone) if owner_id != user_id]
+        owners = (await self._today()).get(phone)
+        if not owners:
+            return []
+        return [owner for owner_id, owner in owners.items() if owner_id != user_id]
+
+    def add(self, phone, user_id, employee_name, region):
+        if not self.shared and self.day == work_day():
+            self.owners.setdefault(phone, {})[user_id] = (employee_name, region)
+
+duplicates = DuplicateIndex()
+
+def format_owners(owners):
+    """Egalari ro'yxatini foydalanuvchiga ko'rsatish uchun matnga aylantirish"""
+    return ", ".join(f"{employee_name} ({region})" for employee_name, region in owners)
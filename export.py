@@ -0,0 +1,67 @@
+import csv
+import os
+
+from database import EXPORT_COLUMNS, async_db
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX eksport ixtiyoriy
+    Workbook = None
+
+# Fayldagi ustun sarlavhalari
+EXPORT_HEADERS = {
+    "created_date": "Vaqt (UTC)",
+    "day": "Kun",
+    "region": "Viloyat",
+    "employee_name": "Xodim",
+    "phone": "Telefon",
+    "comment": "Izoh",
+    "pozivnoy_number": "Pozivnoy",
+}
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+def xlsx_available():
+    return Workbook is not None
+
+def write_table(db, table, path, fmt, day_from, day_to, region=None, employee_name=None):
+    """Jadval qatorlarini faylga oqim bilan yozish; yozilgan qatorlar sonini qaytaradi.
+
+    Qatorlar kursordan bo'lib-bo'lib o'qiladi va darhol faylga yoziladi,
+    shuning uchun xotira qatorlar soniga qarab o'smaydi.
+    """
+    header = [EXPORT_HEADERS[column] for column in EXPORT_COLUMNS[table]]
+    rows = db.iter_export_rows(table, day_from, day_to, region, employee_name)
+    count = 0
+    if fmt == "xlsx":
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(table)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(tuple(row))
+            count += 1
+        workbook.save(path)
+    else:
+        # utf-8-sig: Excel kirill/lotin harflarini to'g'ri ochishi uchun
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(tuple(row))
+                count += 1
+    return count
+
+async def export_tables(directory, fmt, day_from, day_to, region=None, employee_name=None):
+    """numbers va pozivnoy jadvallarini `directory` ichidagi fayllarga eksport qilish.
+
+    [(fayl yo'li, qatorlar soni)] qaytaradi. Yozish o'quvchi oqimida
+    bajariladi, event loop bloklanmaydi.
+    """
+    files = []
+    for table, name in (("numbers", "raqamlar"), ("pozivnoy", "pozivnoylar")):
+        path = os.path.join(directory, f"{name}_{day_from}_{day_to}.{fmt}")
+        count = await async_db.run_in_reader(
+            write_table, async_db.db, table, path, fmt, day_from, day_to, region, employee_name
+        )
+        files.append((path, count))
+    return files
@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict
+
+from aiohttp import web
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import TelegramObject
+
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_LOG_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Kechikish histogrammalari chegaralari (soniya)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metrika nomi: (turi, tavsifi)
+METRICS_HELP = {
+    "bot_handler_seconds": ("histogram", "Handler bajarilish vaqti"),
+    "bot_handler_errors_total": ("counter", "Xato bilan tugagan handlerlar"),
+    "bot_db_query_seconds": ("histogram", "Database metodlari bajarilish vaqti"),
+    "bot_db_rows_total": ("counter", "Database metodlari o'qigan/yozgan qatorlar"),
+    "bot_db_errors_total": ("counter", "Xato bilan tugagan Database metodlari"),
+    "bot_api_request_seconds": ("histogram", "Bot API so'rovlari vaqti (har bir urinish)"),
+    "bot_api_errors_total": ("counter", "Bot API xatolari (429 - flood limit)"),
+    "bot_api_retries_total": ("counter", "Tarmoq va 5xx xatolaridan keyingi qayta urinishlar"),
+}
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    """Jarayon ichidagi hisoblagich va histogrammalar.
+
+    Qiymatlar DB oqimlaridan ham yoziladi, shuning uchun har bir yozuv
+    qisqa lock ostida bajariladi. Yorliqlar (label) (kalit, qiymat)
+    juftlari kortejidan iborat.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        with self.lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + amount
+
+    def snapshot(self):
+        """Joriy qiymatlar nusxasi: histogrammalar (count, sum), hisoblagichlar"""
+        with self.lock:
+            histograms = {key: (h.count, h.sum) for key, h in self.histograms.items()}
+            return histograms, dict(self.counters)
+
+    def render(self):
+        """Prometheus text formatidagi eksport"""
+        with self.lock:
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+        lines = []
+        for name, (kind, description) in METRICS_HELP.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, value in zip(BUCKETS + (float("inf"),), counts):
+                        cumulative += value
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{format_labels(labels)} {count}")
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+metrics = Metrics()
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int):
+        return int(result)
+    return 0 if result is None else 1
+
+def timed_query(func):
+    """Database metodi vaqti va qaytargan qatorlar sonini yozuvchi dekorator.
+
+    Metrikalar o'chirilgan bo'lsa metod o'zgarishsiz qaytariladi.
+    """
+    if not METRICS_ENABLED:
+        return func
+    labels = (("method", func.__name__),)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            metrics.inc("bot_db_errors_total", labels)
+            raise
+        finally:
+            metrics.observe("bot_db_query_seconds", labels, time.perf_counter() - started)
+        metrics.inc("bot_db_rows_total", labels, _row_count(result))
+        return result
+
+    return wrapper
+
+def handler_name(handler_object, event):
+    """Yorliq uchun handler nomi. Tugma matni/callback_data bo'yicha
+    tarqatuvchi handlerlarda `resolve(event)` haqiqiy handlerni qaytaradi"""
+    if handler_object is None:
+        return "unknown"
+    callback = handler_object.callback
+    resolve = getattr(callback, "resolve", None)
+    if resolve is not None:
+        callback = resolve(event) or callback
+    return getattr(callback, "__name__", "unknown")
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Har bir handler bajarilish vaqtini o'lchovchi (ichki) middleware"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        labels = (("handler", handler_name(data.get("handler"), event)),)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            metrics.inc("bot_handler_errors_total", labels)
+            raise
+        finally:
+            metrics.observe("bot_handler_seconds", labels, time.perf_counter() - started)
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Bot API so'rovlari vaqti va xatolari; RateLimiter'dan keyin ulanadi,
+    shunda qayta urinishlarning har biri alohida o'lchanadi"""
+
+    async def __call__(self, make_request, bot, method):
+        api_method = method.__api_method__
+        labels = (("method", api_method),)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter:
+            metrics.inc("bot_api_errors_total", labels + (("error", "429"),))
+            raise
+        except TelegramAPIError as e:
+            metrics.inc("bot_api_errors_total", labels + (("error", type(e).__name__),))
+            raise
+        finally:
+            metrics.observe("bot_api_request_seconds", labels, time.perf_counter() - started)
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """/metrics manzilida Prometheus eksportini beruvchi lokal HTTP server.
+
+    Port band bo'lsa xato log qilinadi va None qaytadi: bot eksportsiz ishlaydi.
+    """
+    async def handle(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"Metrikalar serveri ishga tushmadi ({host}:{port}): {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Metrikalar http://{host}:{port}/metrics da")
+    return runner
+
+async def log_metrics_periodically(interval=METRICS_LOG_INTERVAL):
+    """Oxirgi oraliqdagi o'zgarishlarni JSON log qatorlari sifatida chiqarish"""
+    previous_histograms, previous_counters = {}, {}
+    while True:
+        await asyncio.sleep(interval)
+        histograms, counters = metrics.snapshot()
+        for (name, labels), (count, total) in sorted(histograms.items()):
+            old_count, old_total = previous_histograms.get((name, labels), (0, 0.0))
+            if count == old_count:
+                continue
+            mean_ms = (total - old_total) / (count - old_count) * 1000
+            logger.info(json.dumps({"metric": name, **dict(labels), "count": count - old_count,
+                                    "mean_ms": round(mean_ms, 3)}, ensure_ascii=False))
+        for (name, labels), value in sorted(counters.items()):
+            delta = value - previous_counters.get((name, labels), 0)
+            if delta:
+                logger.info(json.dumps({"metric": name, **dict(labels), "delta": delta}, ensure_ascii=False))
+        previous_histograms, previous_counters = histograms, counters
@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL
+from database import async_db
+
+class ProfileCache:
+    """Xodim profillari (ism, viloyat) uchun chegaralangan LRU/TTL kesh"""
+
+    def __init__(self, maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items = OrderedDict()
+
+    async def get(self, user_id):
+        item = self.items.get(user_id)
+        now = time.monotonic()
+        if item is not None and item[0] > now:
+            self.items.move_to_end(user_id)
+            return item[1]
+        profile = await async_db.get_user_settings(user_id)
+        self.items[user_id] = (now + self.ttl, profile)
+        self.items.move_to_end(user_id)
+        if len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+        return profile
+
+    def invalidate(self, user_id):
+        self.items.pop(user_id, None)
+
+profile_cache = ProfileCache()
+
+class ProfileMiddleware(BaseMiddleware):
+    """Har bir update uchun xodim profilini bir marta aniqlab, handlerga `profile` sifatida berish"""
+
+    def __init__(self, cache=profile_cache):
+        self.cache = cache
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            data["profile"] = await self.cache.get(user.id)
+        return await handler(event, data)
@@ -0,0 +1,97 @@
+import re
+
+# Ko'p qatorli kiritishda bitta qator: "telefon — izoh" (ajratuvchi: — – - : ; , | yoki tab)
+# Raqam ichida guruhlar orasida bitta bo'sh joy, chiziqcha yoki qavs bo'lishi mumkin
+PHONE_PART = r"\+?\(?\d(?:(?: |-|\) ?| ?\()?\d)*"
+SEPARATED_LINE = re.compile(rf"^\s*({PHONE_PART})\s*[—–\-:;,|\t]\s*(.*?)\s*$")
+# Ajratuvchisiz qatorda raqamning bitta guruhi (bo'sh joygacha)
+PHONE_TOKEN = re.compile(r"^\+?\(?\d[\d\-()]*$")
+
+def is_plausible_phone(phone):
+    """Raqamlar soni to'g'rimi: mahalliy 9 ta, 998 bilan 12 ta, boshqa "+" raqamlar 10-15 ta"""
+    digits = re.sub(r"\D", "", phone)
+    if phone.lstrip("(").startswith("+") and not digits.startswith("998"):
+        return 10 <= len(digits) <= 15
+    return len(digits) == 9 or (len(digits) == 12 and digits.startswith("998"))
+
+def split_phone(line):
+    """Qatorni (telefon, izoh) ga ajratish; raqam noaniq bo'lsa None.
+
+    Ajratuvchi bo'lmasa raqam guruhlari to'g'ri uzunlikka yetguncha olinadi,
+    qolgani izoh: "901234567 5 marta" -> ("901234567", "5 marta").
+    """
+    match = SEPARATED_LINE.match(line)
+    if match and is_plausible_phone(match.group(1)):
+        return match.group(1), match.group(2)
+    end = None
+    phone = ""
+    for token in re.finditer(r"\S+", line):
+        if not PHONE_TOKEN.match(token.group()):
+            break
+        phone = line[:token.end()].strip()
+        if is_plausible_phone(phone):
+            end = token.end()
+        digits = re.sub(r"\D", "", phone)
+        # Xorijiy raqam faqat bitta guruh bo'lsa ajratuvchisiz qabul qilinadi
+        if phone.startswith("+") and not digits.startswith("998"):
+            break
+        if len(digits) >= (12 if digits.startswith("998") else 9):
+            break
+    if end is None:
+        return None
+    return line[:end].strip(), line[end:].strip()
+
+def format_phone(phone):
+    """Raqamni +998 formatiga keltirish; raqamsiz matn uchun None.
+
+    Natija faqat `+` va raqamlardan iborat bo'ladi, shuning uchun bir xil
+    raqam har doim bir xil qator sifatida saqlanadi va indeksdan topiladi.
+    """
+    digits = "".join(char for char in phone if char.isdigit())
+    if not digits:
+        return None
+    if phone.startswith('+'):
+        return f"+{digits}"
+    return f"+998{digits[-9:]}"
+
+def parse_phone(text):
+    """Bitta raqamni tekshirib formatlash; noto'g'ri yoki uzunligi noaniq bo'lsa None.
+
+    Ko'p qatorli kiritish bilan bir xil qoidalar (is_plausible_phone).
+
+    >>> parse_phone("90 123-45-67"), parse_phone("+998 (90) 123 45 67")
+    ('+998901234567', '+998901234567')
+    >>> parse_phone("5"), parse_phone("9012345678"), parse_phone("tel 901234567")
+    (None, None, None)
+    """
+    text = text.strip()
+    if not re.fullmatch(PHONE_PART, text) or not is_plausible_phone(text):
+        return None
+    return format_phone(text)
+
+def parse_bulk_numbers(text):
+    """Ko'p qatorli matnni bir o'tishda tahlil qilish.
+
+    (telefon, izoh) juftlari va qabul qilinmagan (qator raqami, qator)
+    ro'yxatini qaytaradi. Bo'sh qatorlar o'tkazib yuboriladi.
+
+    >>> parse_bulk_numbers("901234567 — izoh\\n+998 90 111 22 33: band")[0]
+    [('+998901234567', 'izoh'), ('+998901112233', 'band')]
+    >>> parse_bulk_numbers("901234567 5 marta qo'ng'iroq\\n90 123 45 67 2-chi raqam")[0]
+    [('+998901234567', "5 marta qo'ng'iroq"), ('+998901234567', '2-chi raqam')]
+    >>> parse_bulk_numbers("90-123-45-67 izoh\\n998901234567 12 ta")[0]
+    [('+998901234567', 'izoh'), ('+998901234567', '12 ta')]
+    >>> parse_bulk_numbers("12345 izoh\\n9012345678 izoh\\n901234567")[1]
+    [(1, '12345 izoh'), (2, '9012345678 izoh'), (3, '901234567')]
+    """
+    entries = []
+    rejected = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        parts = split_phone(line)
+        if parts is None or not parts[1]:
+            rejected.append((line_no, line.strip()))
+            continue
+        entries.append((format_phone(parts[0]), parts[1]))
+    return entries, rejected
@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import RATE_LIMIT_GLOBAL, RATE_LIMIT_PER_CHAT, RATE_LIMIT_CHAT_BURST, RATE_LIMIT_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Navbat ustuvorligi: kichik qiymat oldin xizmat qilinadi
+PRIORITY_REPLY = 0
+PRIORITY_CLEANUP = 1
+
+# Foydalanuvchiga ko'rinmaydigan, kechiktirsa bo'ladigan metodlar
+LOW_PRIORITY_METHODS = {"deleteMessage", "deleteMessages"}
+
+# Chat kesimida hisoblanadigan metodlar (xabar yuborish/tahrirlash)
+CHAT_LIMITED_METHODS = {
+    "sendMessage", "sendDocument", "sendPhoto", "copyMessage", "forwardMessage",
+    "editMessageText", "editMessageReplyMarkup",
+}
+
+# Cheklanmaydigan metodlar (getUpdates, setWebhook va h.k.) chat_id'siz bo'ladi
+
+class TokenBucket:
+    """Ustuvorlikli kutish navbatiga ega token bucket.
+
+    Token yetarli bo'lsa `acquire` darhol qaytadi, aks holda so'rov
+    (ustuvorlik, kelish tartibi) bo'yicha navbatga turadi va tokenlar
+    shu tartibda tarqatiladi.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters = []
+        self.counter = itertools.count()
+        self.task = None
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _delay(self):
+        """Keyingi token chiqquncha qolgan vaqt (0 bo'lsa token bor)"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    @property
+    def idle(self):
+        return not self.waiters and self._delay() == 0 and self.tokens >= self.capacity
+
+    async def acquire(self, priority=PRIORITY_REPLY):
+        if not self.waiters and self._delay() == 0:
+            self.tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.counter), future))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._serve())
+        await future
+
+    async def _serve(self):
+        while self.waiters:
+            delay = self._delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                self.tokens -= 1
+                future.set_result(None)
+
+    async def wait_resumed(self):
+        """`pause` muddati tugashini kutish (token olinmaydi)"""
+        while (delay := self.blocked_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        """Telegram `retry_after` bergan muddatgacha tokenlar berilmaydi"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class RateLimiter(BaseRequestMiddleware):
+    """Bot API so'rovlarini Telegram limitlari doirasida yuboruvchi scheduler.
+
+    Umumiy (global) va har bir chat uchun alohida token bucket'lar
+    ishlatiladi; foydalanuvchiga ko'rinadigan javoblar o'chirishlardan
+    oldin o'tkaziladi. 429 (`retry_after`) javobida faqat o'sha chat
+    bucket'i to'xtatiladi (boshqa foydalanuvchilarga javoblar kutmaydi)
+    va so'rov avtomatik qayta yuboriladi.
+    """
+
+    def __init__(self, global_rate=RATE_LIMIT_GLOBAL, chat_rate=RATE_LIMIT_PER_CHAT,
+                 chat_burst=RATE_LIMIT_CHAT_BURST, max_retries=RATE_LIMIT_MAX_RETRIES, max_chats=10000):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self.chat_buckets = {}
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= self.max_chats:
+                # To'liq tiklangan (bo'sh turgan) bucket'larni tashlab yuborish
+                self.chat_buckets = {key: value for key, value in self.chat_buckets.items() if not value.idle}
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def __call__(self, make_request, bot, method):
+        api_method = method.__api_method__
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = PRIORITY_CLEANUP if api_method in LOW_PRIORITY_METHODS else PRIORITY_REPLY
+        # O'chirishlar chat tokenini olmaydi, lekin chat to'xtatilganini hisobga oladi
+        chat_bucket = self._chat_bucket(chat_id)
+        chat_limited = api_method in CHAT_LIMITED_METHODS
+        for attempt in range(self.max_retries + 1):
+            if chat_limited:
+                await chat_bucket.acquire(priority)
+            else:
+                await chat_bucket.wait_resumed()
+            await self.global_bucket.acquire(priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"{api_method} uchun flood limit ({chat_id}): {e.retry_after} soniya kutiladi")
+                chat_bucket.pause(e.retry_after)
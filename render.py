@@ -0,0 +1,57 @@
+# Telegram xabar matni uchun chegara (UTF-16 birliklarida)
+MESSAGE_LIMIT = 4096
+
+def text_length(text):
+    """Telegram hisoblaydigan uzunlik: UTF-16 kod birliklari soni"""
+    return len(text.encode("utf-16-le")) // 2
+
+def split_long_line(line, limit):
+    """Chegaradan uzun bitta qatorni bo'laklarga ajratish"""
+    part = []
+    size = 0
+    for char in line:
+        width = 2 if ord(char) > 0xFFFF else 1
+        if size + width > limit:
+            yield "".join(part)
+            part = []
+            size = 0
+        part.append(char)
+        size += width
+    if part:
+        yield "".join(part)
+
+async def chunk_lines(lines, limit=MESSAGE_LIMIT):
+    """Qatorlar oqimini chiziqli vaqtda `limit` dan oshmaydigan xabarlarga yig'ish.
+
+    `lines` oddiy yoki asinxron iterator bo'lishi mumkin; xotirada faqat
+    joriy xabar turadi.
+    """
+    parts = []
+    size = 0
+    async for line in _aiter(lines):
+        width = text_length(line)
+        if width > limit:
+            pieces = list(split_long_line(line, limit))
+        else:
+            pieces = [line]
+        for piece in pieces:
+            width = text_length(piece)
+            if size + width > limit and parts:
+                text = "".join(parts).rstrip("\n")
+                if text:
+                    yield text
+                parts = []
+                size = 0
+            parts.append(piece)
+            size += width
+    text = "".join(parts).rstrip("\n")
+    if text:
+        yield text
+
+async def _aiter(lines):
+    if hasattr(lines, "__aiter__"):
+        async for line in lines:
+            yield line
+    else:
+        for line in lines:
+            yield line
@@ -0,0 +1,29 @@
+import re
+
+# Telefon qidiruvi: raqamlar, bo'sh joy/chiziqcha, boshida "+" va oxirida "*" yoki "…"
+PHONE_QUERY = re.compile(r"^\+?[\d\s\-()]{3,}[*…]?$")
+
+def reverse_digits(digits):
+    """Raqamlarni teskari tartibda: suffiks qidiruvi `phone_suffix` ustunida prefiks qidiruviga aylanadi"""
+    return digits[::-1]
+
+def parse_search_term(text):
+    """Qidiruv so'zini turini aniqlash: (mode, term) yoki None.
+
+    - "+99890123" yoki "90123*" -> ("prefix", "+99890123") - raqam boshi
+    - "4567" yoki "901234567" -> ("suffix", "7654") - raqam oxiri (teskari)
+    - boshqa matn -> ("text", FTS5 so'rovi) - izohdagi so'zlar (prefiks bilan)
+    """
+    text = text.strip()
+    if not text:
+        return None
+    digits = re.sub(r"\D", "", text)
+    if digits and PHONE_QUERY.match(text):
+        if text.startswith("+"):
+            return "prefix", "+" + digits
+        if text[-1] in "*…":
+            return "prefix", "+998" + digits
+        return "suffix", reverse_digits(digits)
+    words = text.split()
+    # Har bir so'z iqtibos ichida (FTS5 sintaksisi ta'sir qilmasligi uchun), prefiks bilan
+    return "text", " ".join('"' + word.replace('"', '""') + '"*' for word in words)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import random
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+
+from config import (
+    TELEGRAM_API_URL, API_POOL_SIZE, API_KEEPALIVE, API_DNS_TTL,
+    API_TIMEOUT, API_FAST_TIMEOUT, API_UPLOAD_TIMEOUT,
+    API_MAX_RETRIES, API_RETRY_BASE, API_RETRY_CAP,
+)
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Metod bo'yicha so'rov vaqti (soniya); qolganlari uchun API_TIMEOUT.
+# getUpdates vaqtini polling o'zi beradi (long polling + API_TIMEOUT)
+METHOD_TIMEOUTS = {
+    "deleteMessage": API_FAST_TIMEOUT,
+    "deleteMessages": API_FAST_TIMEOUT,
+    "answerCallbackQuery": API_FAST_TIMEOUT,
+    "editMessageText": API_FAST_TIMEOUT,
+    "editMessageReplyMarkup": API_FAST_TIMEOUT,
+    "sendDocument": API_UPLOAD_TIMEOUT,
+}
+
+# Qayta yuborilsa ikki marta bajarilmaydigan metodlar: har qanday tarmoq xatosida
+# qayta urinish mumkin. Boshqalari (xabar yuborish) faqat ulanish o'rnatilmagan
+# yoki server 5xx qaytargan holda qayta yuboriladi, aks holda xabar takrorlanishi mumkin
+IDEMPOTENT_METHODS = {
+    "deleteMessage", "deleteMessages", "editMessageText", "editMessageReplyMarkup",
+    "answerCallbackQuery", "getMe", "getUpdates", "setWebhook", "deleteWebhook",
+}
+
+def api_server():
+    """TELEGRAM_API_URL berilgan bo'lsa o'sha server (lokal Bot API, test serveri)"""
+    return TelegramAPIServer.from_base(TELEGRAM_API_URL) if TELEGRAM_API_URL else PRODUCTION
+
+class BotSession(AiohttpSession):
+    """Sozlangan aiohttp sessiyasi: ulanishlar puli, keep-alive, DNS kesh,
+    metod bo'yicha vaqt chegaralari va vaqtinchalik xatolarda qayta urinish.
+
+    Tarmoq va 5xx xatolari tasodifiy kechikishli eksponensial backoff bilan
+    qayta yuboriladi; 400 kabi doimiy xatolar darhol chaqiruvchiga qaytadi.
+    429 (flood limit) RateLimiter'da alohida ishlanadi.
+    """
+
+    def __init__(self, max_retries=API_MAX_RETRIES, retry_base=API_RETRY_BASE, retry_cap=API_RETRY_CAP, **kwargs):
+        kwargs.setdefault("api", api_server())
+        kwargs.setdefault("timeout", API_TIMEOUT)
+        super().__init__(limit=API_POOL_SIZE, **kwargs)
+        self._connector_init.update(ttl_dns_cache=API_DNS_TTL, keepalive_timeout=API_KEEPALIVE)
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+
+    def _retryable(self, api_method, error):
+        if isinstance(error, TelegramServerError) or api_method in IDEMPOTENT_METHODS:
+            return True
+        # Ulanish o'rnatilmagan: so'rov serverga yetib bormagan
+        return error.message.startswith(("ClientConnectorError", "ClientConnectionError"))
+
+    async def make_request(self, bot, method, timeout=None):
+        api_method = method.__api_method__
+        if timeout is None:
+            timeout = METHOD_TIMEOUTS.get(api_method, self.timeout)
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await super().make_request(bot, method, timeout)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                if attempt == self.max_retries or not self._retryable(api_method, e):
+                    raise
+                # "Full jitter": 0 .. min(cap, base * 2^attempt)
+                delay = random.uniform(0, min(self.retry_cap, self.retry_base * 2 ** attempt))
+                logger.warning(f"{api_method} xatosi ({e.message}), {delay:.2f} soniyadan keyin qayta urinish")
+                metrics.inc("bot_api_retries_total", (("method", api_method),))
+                await asyncio.sleep(delay)
@@ -0,0 +1,12 @@
+from config import WORKERS, WORKER_INDEX
+
+# Ko'p jarayonli rejimda shu jarayon foydalanuvchilarning bir qismiga xizmat qiladi
+SHARDED = WORKERS > 1 and WORKER_INDEX >= 0
+
+def worker_for(user_id, workers=WORKERS):
+    """Foydalanuvchi update'lari doim tushadigan worker raqami"""
+    return user_id % workers
+
+def owns_user(user_id):
+    """Bu foydalanuvchi (yoki shaxsiy chat) shu jarayonga tegishlimi"""
+    return not SHARDED or worker_for(user_id) == WORKER_INDEX
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+
+from config import FSM_FLUSH_INTERVAL, FSM_TTL
+from database import async_db
+from sharding import owns_user
+
+logger = logging.getLogger(__name__)
+
+class SQLiteStorage(BaseStorage):
+    """FSM holatlarini SQLite'da saqlovchi, xotirada keshlanadigan storage.
+
+    Birinchi murojaatda barcha amaldagi yozuvlar xotiraga yuklanadi, shundan
+    keyin o'qishlar faqat keshdan bo'ladi. O'zgarishlar `flush_interval`
+    soniyada bir marta bitta tranzaksiyada yoziladi; `ttl` dan beri
+    o'zgarmagan holatlar o'chiriladi. Ko'p jarayonli rejimda faqat shu
+    workerga tegishli foydalanuvchilarning yozuvlari yuklanadi.
+    """
+
+    def __init__(self, flush_interval=FSM_FLUSH_INTERVAL, ttl=FSM_TTL):
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.records = {}
+        self.dirty = set()
+        self.loading = None
+        self.task = None
+
+    async def _records(self):
+        if self.loading is None:
+            self.loading = asyncio.ensure_future(self._load())
+        await self.loading
+        return self.records
+
+    async def _load(self):
+        for key, state, data in await async_db.load_fsm_records(time.time() - self.ttl):
+            # Kalit oxiri: ...:user_id:destiny
+            if not owns_user(int(key.rsplit(":", 2)[1])):
+                continue
+            self.records[key] = [state, json.loads(data) if data else {}, time.time()]
+        if self.task is None:
+            self.task = asyncio.create_task(self._flush_periodically())
+
+    async def _record(self, key: StorageKey):
+        records = await self._records()
+        name = self.key_builder.build(key)
+        record = records.get(name)
+        return name, record
+
+    async def _update(self, key: StorageKey, state=None, data=None, set_state=False, set_data=False):
+        name, record = await self._record(key)
+        if record is None:
+            record = self.records[name] = [None, {}, 0.0]
+        if set_state:
+            record[0] = state
+        if set_data:
+            record[1] = data
+        record[2] = time.time()
+        if record[0] is None and not record[1]:
+            del self.records[name]
+        self.dirty.add(name)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        await self._update(key, state=state, set_state=True)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._record(key)
+        return record[0] if record else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._update(key, data=data.copy(), set_data=True)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._record(key)
+        return record[1].copy() if record else {}
+
+    def _expire(self):
+        deadline = time.time() - self.ttl
+        for name in [name for name, record in self.records.items() if record[2] < deadline]:
+            del self.records[name]
+            self.dirty.add(name)
+
+    async def flush(self):
+        """O'zgargan yozuvlarni bitta tranzaksiyada SQLite'ga yozish"""
+        self._expire()
+        if not self.dirty:
+            return
+        names, self.dirty = self.dirty, set()
+        rows = []
+        removed = []
+        for name in names:
+            record = self.records.get(name)
+            if record is None:
+                removed.append(name)
+            else:
+                rows.append((name, record[0], json.dumps(record[1], ensure_ascii=False), record[2]))
+        try:
+            await async_db.save_fsm_records(rows, removed)
+        except Exception:
+            self.dirty |= names
+            raise
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"FSM holatlarini saqlashda xato: {e}")
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.loading is not None:
+            await self.flush()
@@ -0,0 +1,90 @@
+import time
+from array import array
+
+from config import MESSAGE_DELETE_MAX_AGE, MESSAGE_TRACKER_MAX_CHATS, MESSAGE_TRACKER_PER_CHAT
+
+class MessageTracker:
+    """Har bir chatdagi bot xabarlari id'larini ixcham saqlovchi tuzilma.
+
+    Har bir chat uchun bitta `array('q')` ([id1, vaqt1, id2, vaqt2, ...])
+    saqlanadi. Lug'at tartibi oxirgi faollik bo'yicha (LRU): `idle_ttl`
+    dan beri faol bo'lmagan yoki `max_chats` dan ortiq chatlar eng
+    eskisidan boshlab chiqarib tashlanadi. Standart `idle_ttl` Telegram
+    o'chirishga ruxsat beradigan muddatga teng, shuning uchun chiqarilgan
+    id'lar baribir o'chirib bo'lmaydigan xabarlardir.
+    """
+
+    def __init__(self, max_per_chat=MESSAGE_TRACKER_PER_CHAT, max_chats=MESSAGE_TRACKER_MAX_CHATS,
+                 idle_ttl=MESSAGE_DELETE_MAX_AGE):
+        self.max_per_chat = max_per_chat
+        self.max_chats = max_chats
+        self.idle_ttl = idle_ttl
+        self.chats = {}
+        self.dirty = set()
+        self.removed = set()
+
+    def __len__(self):
+        return len(self.chats)
+
+    def add(self, chat_id, message_id, sent_at=None):
+        """Xabarni qo'shish; chat limitidan oshgan eski (id, vaqt) juftlarini qaytaradi"""
+        now = int(sent_at or time.time())
+        items = self.chats.pop(chat_id, None)
+        # append() zaxira joy ajratadi; qo'shish esa aniq o'lchamdagi massiv beradi
+        pair = array('q', (message_id, now))
+        items = pair if items is None else items + pair
+        overflow = []
+        extra = len(items) // 2 - self.max_per_chat
+        if extra > 0:
+            overflow = self._pairs(items[:extra * 2])
+            del items[:extra * 2]
+        # Qayta qo'shish chatni LRU tartibining oxiriga o'tkazadi
+        self.chats[chat_id] = items
+        self._touch(chat_id)
+        self._evict(now)
+        return overflow
+
+    def pop_stale(self, chat_id):
+        """Oxirgisidan tashqari barcha (id, vaqt) juftlarini olib tashlab qaytarish"""
+        items = self.chats.get(chat_id)
+        if items is None or len(items) <= 2:
+            return []
+        stale = self._pairs(items[:-2])
+        del items[:-2]
+        self._touch(chat_id)
+        return stale
+
+    def _evict(self, now):
+        deadline = now - self.idle_ttl
+        while self.chats:
+            chat_id = next(iter(self.chats))
+            items = self.chats[chat_id]
+            if len(self.chats) <= self.max_chats and items and items[-1] >= deadline:
+                break
+            del self.chats[chat_id]
+            self.dirty.discard(chat_id)
+            self.removed.add(chat_id)
+
+    def _touch(self, chat_id):
+        self.dirty.add(chat_id)
+        self.removed.discard(chat_id)
+
+    @staticmethod
+    def _pairs(items):
+        return list(zip(items[::2], items[1::2]))
+
+    def dump_changes(self):
+        """Oxirgi chaqiruvdan beri o'zgargan chatlar: ([(chat_id, data, vaqt)], [o'chirilgan chat_id])"""
+        now = time.time()
+        rows = [(chat_id, self.chats[chat_id].tobytes(), now) for chat_id in self.dirty]
+        removed = list(self.removed)
+        self.dirty.clear()
+        self.removed.clear()
+        return rows, removed
+
+    def load(self, rows):
+        """SQLite'dan o'qilgan (chat_id, data) qatorlarini tiklash"""
+        for chat_id, data in rows:
+            items = array('q')
+            items.frombytes(data)
+            self.chats[chat_id] = items
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import signal
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT
+
+logger = logging.getLogger(__name__)
+
+def create_app(dp, bot):
+    """aiogram webhook handleri ulangan aiohttp ilovasi"""
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET or None).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+async def register_webhook(bot, dispatcher):
+    """Ishga tushishda webhook'ni Telegram'da ro'yxatdan o'tkazish"""
+    if not WEBHOOK_BASE_URL:
+        logger.warning("WEBHOOK_BASE_URL berilmagan, webhook ro'yxatdan o'tkazilmadi")
+        return
+    await bot.set_webhook(
+        f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logger.info(f"Webhook o'rnatildi: {WEBHOOK_BASE_URL}{WEBHOOK_PATH}")
+
+async def unregister_webhook(bot):
+    """To'xtashda webhook'ni o'chirish"""
+    if WEBHOOK_BASE_URL:
+        await bot.delete_webhook()
+
+async def run_webhook(dp, bot):
+    """Webhook serverini ishga tushirib, to'xtatilguncha kutish"""
+    dp.startup.register(register_webhook)
+    dp.shutdown.register(unregister_webhook)
+    runner = web.AppRunner(create_app(dp, bot))
+    await runner.setup()
+    site = web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT)
+    await site.start()
+    logger.info(f"Webhook server {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH} da tinglamoqda")
+    # SIGTERM (docker stop, systemd) va Ctrl-C serverni to'xtatib shutdown
+    # hooklarini ishga tushiradi: webhook o'chiriladi, navbatlar saqlanadi
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+        logger.info("Webhook server to'xtatilmoqda...")
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        await runner.cleanup()
@@ -0,0 +1,254 @@
+"""Ko'p jarayonli rejim: front jarayon update'larni qabul qilib, ularni
+`from_user.id` bo'yicha N ta worker jarayonga taqsimlaydi.
+
+Har bir worker `bot.py` dagi dispatcher va handlerlarni o'zi ishga
+tushiradi. Bir foydalanuvchining update'lari doim bitta workerga tushadi,
+shuning uchun uning FSM holati, profil keshi va xabarlar kuzatuvchisi
+shu jarayonda qoladi. SQLite bazasi WAL rejimida umumiy ishlatiladi.
+
+Ishga tushirish:
+    WORKERS=4 python workers.py
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot
+
+from config import (
+    BOT_MODE, BOT_TOKEN, METRICS_PORT, RATE_LIMIT_GLOBAL, WORKERS,
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+)
+from database import db
+from session import BotSession
+from sharding import worker_for
+
+logger = logging.getLogger(__name__)
+
+# Front jarayon so'raydigan update turlari va long polling kutish vaqti (soniya)
+ALLOWED_UPDATES = ["message", "callback_query"]
+POLL_TIMEOUT = 30
+
+# Worker navbatni shu oraliqda (soniya) kutib, front jarayon tirikligini tekshiradi
+PARENT_CHECK_INTERVAL = 1.0
+
+def update_user_id(update):
+    """Xom update'dagi foydalanuvchi ID'si (topilmasa 0)"""
+    for value in update.values():
+        if isinstance(value, dict):
+            user = value.get("from") or value.get("user") or value.get("chat")
+            if user:
+                return user.get("id", 0)
+    return 0
+
+def route(updates, queues):
+    """Update'larni workerlar bo'yicha guruhlab, har biriga bitta paket yuborish"""
+    batches = [[] for _ in queues]
+    for update in updates:
+        batches[worker_for(update_user_id(update), len(queues))].append(update)
+    for updates_queue, batch in zip(queues, batches):
+        if batch:
+            updates_queue.put(batch)
+
+def start_workers(count, target=None, args=()):
+    """`count` ta worker jarayonni ishga tushirish; har biriga o'z navbati.
+
+    Worker sozlamalari muhit o'zgaruvchilari orqali beriladi: raqami,
+    metrikalar porti va umumiy API limitining ulushi.
+    """
+    context = multiprocessing.get_context("spawn")
+    queues, processes = [], []
+    for index in range(count):
+        updates_queue = context.Queue()
+        env = {
+            "WORKERS": str(count),
+            "WORKER_INDEX": str(index),
+            "METRICS_PORT": str(METRICS_PORT + index),
+            "RATE_LIMIT_GLOBAL": str(RATE_LIMIT_GLOBAL / count),
+        }
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        try:
+            process = context.Process(target=target or run_worker, args=(updates_queue, *args),
+                                      name=f"bot-worker-{index}")
+            process.start()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        queues.append(updates_queue)
+        processes.append(process)
+    return queues, processes
+
+def stop_workers(queues, processes, timeout=30):
+    """Workerlarga to'xtash belgisini yuborib, navbatdagilarni tugatishini kutish"""
+    for updates_queue in queues:
+        updates_queue.put(None)
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            logger.warning(f"{process.name} o'z vaqtida to'xtamadi")
+            process.terminate()
+
+def run_worker(updates_queue):
+    # Ctrl-C front jarayon orqali (navbatdagi None) to'xtatadi; SIGTERM va
+    # front jarayon o'limini worker o'zi kuzatadi (serve)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(updates_queue))
+
+async def serve(updates_queue, on_ready=None):
+    """Worker sikli: navbatdan update paketlarini olib, dispatcher'ga berish.
+
+    Navbatdagi None, SIGTERM yoki front jarayonning o'limi siklni tugatadi;
+    har holda shutdown hooklari (yozuvlar navbati, FSM, tracker) bajariladi.
+    """
+    # bot.py faqat worker ichida import qilinadi: front jarayonga dispatcher kerak emas
+    import bot as app
+
+    app.dp.startup.register(app.on_startup)
+    app.dp.shutdown.register(app.on_shutdown)
+    await app.dp.emit_startup(bot=app.bot)
+    if on_ready is not None:
+        on_ready()
+
+    async def handle(update):
+        try:
+            await app.dp.feed_raw_update(app.bot, update)
+        except Exception:
+            logger.exception("Update'ni qayta ishlashda xato")
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    # Front jarayon sentinel'i orqali kuzatiladi (getppid ishga tushish paytida poyga beradi)
+    parent = multiprocessing.parent_process()
+    tasks = set()
+    processed = 0
+    try:
+        while True:
+            if stop.is_set():
+                logger.info("SIGTERM olindi, worker to'xtatilmoqda")
+                break
+            if parent is not None and not parent.is_alive():
+                logger.warning("Front jarayon to'xtagan, worker to'xtatilmoqda")
+                break
+            try:
+                batch = await loop.run_in_executor(None, updates_queue.get, True, PARENT_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            if batch is None:
+                break
+            for update in batch:
+                task = asyncio.create_task(handle(update))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            processed += len(batch)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        loop.remove_signal_handler(signal.SIGTERM)
+        await app.dp.emit_shutdown(bot=app.bot)
+        await app.bot.session.close()
+    return processed
+
+async def poll(queues):
+    """Long polling: getUpdates javobi parse qilinmasdan workerlarga yuboriladi"""
+    bot = Bot(token=BOT_TOKEN, session=BotSession())
+    url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+    offset = 0
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.post(
+                    url,
+                    json={"offset": offset, "timeout": POLL_TIMEOUT, "allowed_updates": ALLOWED_UPDATES},
+                    timeout=aiohttp.ClientTimeout(total=POLL_TIMEOUT + 10),
+                ) as response:
+                    payload = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"getUpdates so'rovida xato: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not payload.get("ok"):
+                logger.error(f"getUpdates xatosi: {payload.get('description')}")
+                await asyncio.sleep(payload.get("parameters", {}).get("retry_after", 1))
+                continue
+            updates = payload["result"]
+            if updates:
+                offset = updates[-1]["update_id"] + 1
+                route(updates, queues)
+
+async def receive_webhook(queues):
+    """Webhook: kelgan update darhol tegishli workerga yuboriladi"""
+    bot = Bot(token=BOT_TOKEN, session=BotSession())
+
+    async def handle(request):
+        if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+            return web.Response(status=401)
+        route([await request.json()], queues)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT).start()
+    if WEBHOOK_BASE_URL:
+        await bot.set_webhook(f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}",
+                              secret_token=WEBHOOK_SECRET or None, allowed_updates=ALLOWED_UPDATES)
+    else:
+        logger.warning("WEBHOOK_BASE_URL berilmagan, webhook ro'yxatdan o'tkazilmadi")
+    logger.info(f"Webhook server {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH} da tinglamoqda")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if WEBHOOK_BASE_URL:
+            await bot.delete_webhook()
+        await runner.cleanup()
+        await bot.session.close()
+
+async def watch(processes):
+    """Birorta worker kutilmaganda to'xtasa, butun jarayonni to'xtatish"""
+    while True:
+        await asyncio.sleep(1)
+        for process in processes:
+            if not process.is_alive():
+                raise RuntimeError(f"{process.name} to'xtadi (exit code {process.exitcode})")
+
+async def main(count=WORKERS):
+    # Migratsiyalar workerlar ishga tushishidan oldin front jarayonda bajariladi
+    db.close()
+    logger.info(f"Bot {count} ta worker bilan ishga tushdi...")
+    queues, processes = start_workers(count)
+    receiver = receive_webhook(queues) if BOT_MODE == "webhook" else poll(queues)
+    # SIGTERM/SIGINT: qabul qilish to'xtatiladi, workerlar navbatini tugatib chiqadi
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    tasks = [asyncio.create_task(receiver), asyncio.create_task(watch(processes)), asyncio.create_task(stop.wait())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+        logger.info("Bot to'xtatilmoqda...")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        stop_workers(queues, processes)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass